@@ -16,6 +16,37 @@ function api(path) {
   return `${API_BASE}${path}`;
 }
 
+// Results of the initial POST /batch, consumed once by apiGet
+const prefetched = new Map();
+
+async function prefetchBatch(paths) {
+  try {
+    const res = await fetch(api("/batch"), {
+      method: "POST",
+      credentials: "include",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ requests: paths.map((path) => ({ id: path, method: "GET", path })) }),
+    });
+    if (!res.ok) return;
+    const data = await res.json();
+    (data.results || []).forEach((r) => prefetched.set(r.id, r));
+  } catch (err) {
+    console.warn("[student] Batch prefetch failed, falling back to single requests:", err);
+  }
+}
+
+async function apiGet(path) {
+  const hit = prefetched.get(path);
+  if (hit) {
+    prefetched.delete(path);
+    return new Response(JSON.stringify(hit.body), {
+      status: hit.status,
+      headers: { "Content-Type": "application/json" },
+    });
+  }
+  return fetch(api(path), { credentials: "include" });
+}
+
 const DAY_LABELS = ["MON", "TUE", "WED", "THU", "FRI", "SAT"];
 
 // ==================== STATE ====================
@@ -65,6 +96,10 @@ let sessionPollInterval = null;
 let bookingPollInterval = null;
 const SESSION_POLL_MS = 15000;
 const BOOKING_POLL_MS = 5000;
+// While the push stream (GET /events) is open, polling only backs it up
+const PUSH_FALLBACK_POLL_MS = 60000;
+let eventSource = null;
+let pushConnected = false;
 
 // ==================== NOTIFICATION ====================
 function showNotification(message, type = "success") {
@@ -134,7 +169,7 @@ function updatePager(total) {
 async function fetchSessions() {
   console.log("[student] Fetching sessions...");
   try {
-    const res = await fetch(api("/sessions/browse"), { credentials: "include" });
+    const res = await apiGet("/sessions/browse");
     if (res.status === 401) {
       window.location.href = "/login.html";
       return;
@@ -171,7 +206,7 @@ async function fetchSessions() {
 async function fetchMyBookings() {
   console.log("[student] Fetching bookings...");
   try {
-    const res = await fetch(api("/bookings"), { credentials: "include" });
+    const res = await apiGet("/bookings");
     if (!res.ok) {
       console.error("[student] Bookings API error:", res.status);
       return;
@@ -203,7 +238,7 @@ async function fetchMyBookings() {
 async function fetchProfile() {
   console.log("[student] Fetching profile...");
   try {
-    const res = await fetch(api("/students/profile"), { credentials: "include" });
+    const res = await apiGet("/students/profile");
     if (res.status === 401) {
       window.location.href = "/login.html";
       return;
@@ -225,7 +260,7 @@ async function fetchProfile() {
 async function fetchSidebar() {
   console.log("[student] Fetching sidebar...");
   try {
-    const res = await fetch(api("/students/messaging/sidebar"), { credentials: "include" });
+    const res = await apiGet("/students/messaging/sidebar");
     if (res.status === 401) {
       window.location.href = "/login.html";
       return;
@@ -713,25 +748,62 @@ function formatHourLabel() {
 }
 
 // ==================== POLLING ====================
+async function refreshBookings() {
+  const oldConfirmedCount = state.confirmed.size;
+  await fetchMyBookings();
+  if (state.confirmed.size > oldConfirmedCount) {
+    showNotification("🎉 A session has been confirmed!", "success");
+  }
+}
+
 function startSessionPolling() {
   if (sessionPollInterval) clearInterval(sessionPollInterval);
-  sessionPollInterval = setInterval(fetchSessions, SESSION_POLL_MS);
+  sessionPollInterval = setInterval(fetchSessions, pushConnected ? PUSH_FALLBACK_POLL_MS : SESSION_POLL_MS);
 }
 
 function startBookingPolling() {
   if (bookingPollInterval) clearInterval(bookingPollInterval);
-  bookingPollInterval = setInterval(async () => {
-    const oldConfirmedCount = state.confirmed.size;
-    await fetchMyBookings();
-    if (state.confirmed.size > oldConfirmedCount) {
-      showNotification("🎉 A session has been confirmed!", "success");
-    }
-  }, BOOKING_POLL_MS);
+  bookingPollInterval = setInterval(refreshBookings, pushConnected ? PUSH_FALLBACK_POLL_MS : BOOKING_POLL_MS);
 }
 
 function stopPolling() {
   if (sessionPollInterval) clearInterval(sessionPollInterval);
   if (bookingPollInterval) clearInterval(bookingPollInterval);
+  if (eventSource) eventSource.close();
+}
+
+// Coalesce bursts of events (e.g. publish-all) into one refetch
+function debounce(fn, ms) {
+  let timer = null;
+  return () => {
+    clearTimeout(timer);
+    timer = setTimeout(fn, ms);
+  };
+}
+
+// ==================== PUSH UPDATES ====================
+function connectEvents() {
+  if (!window.EventSource) return;
+  const refetchSessions = debounce(fetchSessions, 300);
+  const refetchBookings = debounce(refreshBookings, 300);
+  const setConnected = (connected) => {
+    if (pushConnected === connected) return;
+    pushConnected = connected;
+    startSessionPolling();
+    startBookingPolling();
+  };
+
+  eventSource = new EventSource(api("/events"), { withCredentials: true });
+  eventSource.addEventListener("open", () => setConnected(true));
+  // EventSource reconnects by itself; poll at the normal rate until it does
+  eventSource.addEventListener("error", () => setConnected(false));
+  eventSource.addEventListener("booking.updated", refetchBookings);
+  eventSource.addEventListener("session.updated", refetchSessions);
+  eventSource.addEventListener("session.published", refetchSessions);
+  eventSource.addEventListener("resync", () => {
+    refetchSessions();
+    refetchBookings();
+  });
 }
 
 window.addEventListener("beforeunload", stopPolling);
@@ -802,9 +874,18 @@ function attachEvents() {
 (async function init() {
   console.log("[student] Initializing...");
 
+  // One round trip for the auth check and the initial data
+  await prefetchBatch([
+    "/auth/me",
+    "/sessions/browse",
+    "/bookings",
+    "/students/profile",
+    "/students/messaging/sidebar",
+  ]);
+
   // Check auth
   try {
-    const authRes = await fetch(api("/auth/me"), { credentials: "include" });
+    const authRes = await apiGet("/auth/me");
     if (!authRes.ok) {
       window.location.href = "/login.html";
       return;
@@ -827,9 +908,10 @@ function attachEvents() {
     fetchSidebar(), // NEW: Fetch sidebar data
   ]);
 
-  // Start polling
+  // Start polling, slowed down once the push stream connects
   startSessionPolling();
   startBookingPolling();
+  connectEvents();
 
   console.log("[student] Ready");
 })();
\ No newline at end of file
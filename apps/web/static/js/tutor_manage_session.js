@@ -26,6 +26,10 @@ let sessionPollInterval = null;
 let participantPollInterval = null;
 const SESSION_POLL_INTERVAL_MS = 5000; // 5 seconds (less frequent to reduce noise)
 const PARTICIPANT_POLL_INTERVAL_MS = 5000; // 5 seconds for participants
+// While the push stream (GET /events) is open, polling only backs it up
+const PUSH_FALLBACK_POLL_MS = 60000;
+let eventSource = null;
+let pushConnected = false;
 
 function startSessionPolling() {
     if (sessionPollInterval) {
@@ -36,7 +40,7 @@ function startSessionPolling() {
     sessionPollInterval = setInterval(async () => {
         console.log("[tutor_sessions] Polling for session updates...");
         await fetchSessions(true); // silent fetch - no alerts
-    }, SESSION_POLL_INTERVAL_MS);
+    }, pushConnected ? PUSH_FALLBACK_POLL_MS : SESSION_POLL_INTERVAL_MS);
 }
 
 function startParticipantPolling() {
@@ -53,24 +57,27 @@ function startParticipantPolling() {
             stopParticipantPolling();
             return;
         }
-        
-        const session = sessions.find(s => s.id === selectedSessionId);
-        if (!session) return;
-        
-        const oldParticipantCount = session.participants?.length || 0;
-        
-        // Fetch updated participants silently
-        const participants = await fetchParticipants(selectedSessionId, true);
-        
-        // Only update and re-render if there's an actual change
-        const newParticipantCount = participants.length;
-        
-        if (newParticipantCount !== oldParticipantCount) {
-            session.participants = participants;
-            console.log("[tutor_sessions] Participant count changed:", oldParticipantCount, "->", newParticipantCount);
-            renderSessionDetails(session);
-        }
-    }, PARTICIPANT_POLL_INTERVAL_MS);
+        await refreshParticipants();
+    }, pushConnected ? PUSH_FALLBACK_POLL_MS : PARTICIPANT_POLL_INTERVAL_MS);
+}
+
+async function refreshParticipants() {
+    const session = sessions.find(s => s.id === selectedSessionId);
+    if (!session) return;
+    
+    const oldParticipantCount = session.participants?.length || 0;
+    
+    // Fetch updated participants silently
+    const participants = await fetchParticipants(selectedSessionId, true);
+    
+    // Only update and re-render if there's an actual change
+    const newParticipantCount = participants.length;
+    
+    if (newParticipantCount !== oldParticipantCount) {
+        session.participants = participants;
+        console.log("[tutor_sessions] Participant count changed:", oldParticipantCount, "->", newParticipantCount);
+        renderSessionDetails(session);
+    }
 }
 
 function stopSessionPolling() {
@@ -97,6 +104,45 @@ function stopAllPolling() {
 // Stop polling when leaving page
 window.addEventListener("beforeunload", stopAllPolling);
 
+// Coalesce bursts of events (e.g. publish-all) into one refetch
+function debounce(fn, ms) {
+    let timer = null;
+    return () => {
+        clearTimeout(timer);
+        timer = setTimeout(fn, ms);
+    };
+}
+
+// ==================== PUSH UPDATES ====================
+function connectEvents() {
+    if (!window.EventSource || eventSource) return;
+    const refetchSessions = debounce(() => fetchSessions(true), 300);
+    const refetchParticipants = debounce(refreshParticipants, 300);
+    const setConnected = (connected) => {
+        if (pushConnected === connected) return;
+        pushConnected = connected;
+        console.log("[tutor_sessions] Push stream", connected ? "connected" : "lost");
+        // restart whichever timers are running at the new rate
+        if (sessionPollInterval) startSessionPolling();
+        if (participantPollInterval) startParticipantPolling();
+    };
+
+    eventSource = new EventSource(api("/events"), { withCredentials: true });
+    eventSource.addEventListener("open", () => setConnected(true));
+    eventSource.addEventListener("error", () => setConnected(false));
+    const onSessionEvent = (e) => {
+        refetchSessions();
+        const { session } = JSON.parse(e.data);
+        if (session && session.id === selectedSessionId) refetchParticipants();
+    };
+    eventSource.addEventListener("session.updated", onSessionEvent);
+    eventSource.addEventListener("session.published", onSessionEvent);
+    eventSource.addEventListener("resync", () => {
+        refetchSessions();
+        if (selectedSessionId) refetchParticipants();
+    });
+}
+
 // Visibility API - pause when tab hidden, resume when visible
 document.addEventListener("visibilitychange", () => {
     if (document.hidden) {
@@ -1051,8 +1097,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     attachEventListeners();
     await fetchSessions();
     
-    // Start session polling (silent - no alerts)
+    // Start session polling (silent - no alerts), slowed down once the push stream connects
     startSessionPolling();
+    connectEvents();
     
     console.log("[tutor_sessions] Ready!");
     console.log("[tutor_sessions] - Session list polls every", SESSION_POLL_INTERVAL_MS/1000, "seconds (silent)");
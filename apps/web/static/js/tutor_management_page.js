@@ -26,6 +26,10 @@ let bookingRequests = [];
 // ==================== AUTO-POLLING FOR BOOKING REQUESTS ====================
 let bookingPollInterval = null;
 const BOOKING_POLL_INTERVAL_MS = 2000; // 2 seconds for fast updates
+// While the push stream (GET /events) is open, polling only backs it up
+const PUSH_FALLBACK_POLL_MS = 60000;
+let eventSource = null;
+let pushConnected = false;
 
 function startBookingPolling() {
   if (bookingPollInterval) {
@@ -35,7 +39,7 @@ function startBookingPolling() {
   
   bookingPollInterval = setInterval(() => {
     fetchBookingRequests(true); // silent fetch
-  }, BOOKING_POLL_INTERVAL_MS);
+  }, pushConnected ? PUSH_FALLBACK_POLL_MS : BOOKING_POLL_INTERVAL_MS);
 }
 
 function stopBookingPolling() {
@@ -74,6 +78,37 @@ function updateRequestsTabBadge(pendingCount) {
 // Stop polling when leaving page
 window.addEventListener("beforeunload", stopBookingPolling);
 
+// Coalesce bursts of events into one refetch
+function debounce(fn, ms) {
+  let timer = null;
+  return () => {
+    clearTimeout(timer);
+    timer = setTimeout(fn, ms);
+  };
+}
+
+// ==================== PUSH UPDATES ====================
+function connectEvents() {
+  if (!window.EventSource || eventSource) return;
+  const refetchBookings = debounce(() => fetchBookingRequests(true), 300);
+  const refetchAvailability = debounce(fetchAvailability, 300);
+  const setConnected = (connected) => {
+    if (pushConnected === connected) return;
+    pushConnected = connected;
+    if (bookingPollInterval) startBookingPolling();
+  };
+
+  eventSource = new EventSource(api("/events"), { withCredentials: true });
+  eventSource.addEventListener("open", () => setConnected(true));
+  eventSource.addEventListener("error", () => setConnected(false));
+  eventSource.addEventListener("booking.updated", refetchBookings);
+  eventSource.addEventListener("slot.updated", refetchAvailability);
+  eventSource.addEventListener("resync", () => {
+    refetchBookings();
+    refetchAvailability();
+  });
+}
+
 // Visibility API - pause when tab hidden, resume when visible
 document.addEventListener("visibilitychange", () => {
   if (document.hidden) {
@@ -1080,8 +1115,9 @@ function attachEvents() {
   await fetchAvailability();
   await fetchBookingRequests();
   
-  // Start polling for booking requests
+  // Start polling for booking requests, slowed down once the push stream connects
   startBookingPolling();
+  connectEvents();
   
   console.log("[tutor] Ready!");
 })();
\ No newline at end of file
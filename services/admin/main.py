@@ -4,6 +4,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uvicorn
+import sys
+from pathlib import Path
+
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.metrics import install_metrics
+from common.tracing import install_tracing
 
 app = FastAPI(title="Admin Service")
 
@@ -16,6 +23,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "admin")
+TRACER = install_tracing(app, "admin")
+
 # Simple in-memory user service
 class SimpleUserService:
     def __init__(self):
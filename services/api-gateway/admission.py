@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Dict
+
+from upstreams import env_setting
+
+
+class Overloaded(Exception):
+    def __init__(self, upstream: str, reason: str, retry_after: int):
+        super().__init__(f"{upstream} overloaded ({reason})")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit plus a bounded wait queue for one upstream.
+
+    Up to max_concurrent requests run at once; up to max_queue more wait for a
+    slot. A request is shed (Overloaded) when the queue is already full or it
+    waited longer than queue_timeout, so a slow service cannot pile up work
+    that delays every other route on the event loop.
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 100, max_queue: int = 200, queue_timeout: float = 2.0, retry_after: int = 1):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdmissionController":
+        return cls(
+            name,
+            max_concurrent=int(env_setting(name, "MAX_CONCURRENT", "100")),
+            max_queue=int(env_setting(name, "MAX_QUEUE", "200")),
+            queue_timeout=float(env_setting(name, "QUEUE_TIMEOUT", "2")),
+            retry_after=int(env_setting(name, "RETRY_AFTER", "1")),
+        )
+
+    async def acquire(self) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                raise Overloaded(self.name, "queue full", self.retry_after)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed_timeout += 1
+                raise Overloaded(self.name, "queue timeout", self.retry_after) from None
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queueDepth": self.waiting,
+            "maxConcurrent": self.max_concurrent,
+            "maxQueue": self.max_queue,
+            "queueTimeout": self.queue_timeout,
+            "admitted": self.admitted,
+            "shedQueueFull": self.shed_queue_full,
+            "shedTimeout": self.shed_timeout,
+        }
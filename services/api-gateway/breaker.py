@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+import httpx
+
+from upstreams import Replica, UpstreamPool, env_setting
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Services whose health check does not live at /health
+DEFAULT_HEALTH_PATHS = {"admin": "api/health"}
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    Closed: calls flow and their outcomes go into a rolling window; a call
+    counts as failed on a connection error, a 5xx, or when it is slower than
+    slow_call. Once the window holds min_calls and the failure ratio reaches
+    failure_ratio, the breaker opens and calls fail fast for open_seconds.
+    Half-open: a limited number of trial calls go through; one success closes
+    the breaker, one failure opens it again. A background /health probe can
+    move an open breaker to half-open early, and a passing probe frees the
+    trial slots of a half-open one, so a call that never reported back
+    cannot keep it from trying again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        slow_call: float = 5.0,
+        open_seconds: float = 10.0,
+        half_open_calls: int = 1,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._trials = 0
+        self.rejected = 0
+        self.trips = 0
+        self.probe_ok = 0
+        self.probe_failed = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=int(env_setting(name, "BREAKER_WINDOW", "20")),
+            min_calls=int(env_setting(name, "BREAKER_MIN_CALLS", "5")),
+            failure_ratio=float(env_setting(name, "BREAKER_FAILURE_RATIO", "0.5")),
+            slow_call=float(env_setting(name, "BREAKER_SLOW_CALL", "5")),
+            open_seconds=float(env_setting(name, "BREAKER_OPEN_SECONDS", "10")),
+            half_open_calls=int(env_setting(name, "BREAKER_HALF_OPEN_CALLS", "1")),
+        )
+
+    def retry_after(self) -> int:
+        remaining = self.opened_at + self.open_seconds - time.monotonic()
+        return max(1, int(remaining + 0.999))
+
+    def allow(self) -> bool:
+        """Return True if a call may go upstream now (reserves a trial slot when half-open)."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._half_open()
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._trials += 1
+        return True
+
+    def record(self, ok: bool, latency: float) -> None:
+        ok = ok and latency <= self.slow_call
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            if ok:
+                self._close()
+            else:
+                self._open()
+            return
+        if self.state == OPEN:
+            return
+        self._outcomes.append((ok, latency))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for success, _ in self._outcomes if not success)
+        if failures / len(self._outcomes) >= self.failure_ratio:
+            self._open()
+
+    def cancel(self) -> None:
+        """Give back a half-open trial slot for a call that ended without an outcome."""
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+
+    def record_probe(self, ok: bool) -> None:
+        if ok:
+            self.probe_ok += 1
+            if self.state in (OPEN, HALF_OPEN):
+                self._half_open()
+        else:
+            self.probe_failed += 1
+            if self.state == HALF_OPEN:
+                self._open()
+            elif self.state == CLOSED:
+                self.record(False, 0.0)
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            self.trips += 1
+            print(f"[gateway] circuit for {self.name} opened")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._trials = 0
+
+    def _half_open(self) -> None:
+        self.state = HALF_OPEN
+        self._trials = 0
+
+    def _close(self) -> None:
+        if self.state != CLOSED:
+            print(f"[gateway] circuit for {self.name} closed")
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._trials = 0
+
+    def stats(self) -> Dict[str, Any]:
+        failures = sum(1 for success, _ in self._outcomes if not success)
+        return {
+            "state": self.state,
+            "windowCalls": len(self._outcomes),
+            "windowFailures": failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "probeOk": self.probe_ok,
+            "probeFailed": self.probe_failed,
+        }
+
+
+async def probe_health(pools: Dict[str, UpstreamPool], breakers: Dict[str, CircuitBreaker], interval: float, timeout: float) -> None:
+    """
+    Background loop: GET the health endpoint of every replica of each upstream,
+    move replicas in and out of rotation, and tell the breaker whether any
+    replica is up.
+    """
+
+    async def check(pool: UpstreamPool, replica: Replica, path: str) -> bool:
+        try:
+            resp = await pool.client.get(pool.url(path, replica), timeout=timeout)
+            ok = resp.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        pool.mark(replica, ok)
+        return ok
+
+    async def probe(name: str, pool: UpstreamPool) -> None:
+        path = env_setting(name, "HEALTH_PATH", DEFAULT_HEALTH_PATHS.get(name, "health"))
+        results = await asyncio.gather(*(check(pool, replica, path) for replica in pool.replicas))
+        breakers[name].record_probe(any(results))
+
+    while True:
+        await asyncio.gather(*(probe(name, pool) for name, pool in pools.items() if pool.client is not None))
+        await asyncio.sleep(interval)
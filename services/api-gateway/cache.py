@@ -0,0 +1,261 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import Response
+
+from common.etag import NOT_MODIFIED_HEADERS, etag_matches
+
+# Headers upstreams use to talk to the gateway cache; never forwarded to clients
+TAGS_HEADER = "x-cache-tags"
+PURGE_HEADER = "x-cache-purge"
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def parse_tags(value: Optional[str]) -> Set[str]:
+    return {t.strip() for t in (value or "").split(",") if t.strip()}
+
+
+class CachedResponse:
+    __slots__ = ("status_code", "headers", "body", "expires_at", "tags", "size")
+
+    def __init__(self, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes, expires_at: float, tags: Set[str]):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+        self.tags = tags
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers)
+
+
+class ResponseCache:
+    """
+    In-gateway cache for upstream GET responses.
+
+    Upstreams opt in with Cache-Control: s-maxage (or max-age) sets the gateway
+    TTL, "private" scopes the entry to the calling user, and no-store / Vary: *
+    disable caching. Vary'd request headers become part of the key. Entries are
+    labelled with the tags from X-Cache-Tags and dropped when any response
+    carries a matching X-Cache-Purge. Total body size is capped at max_bytes
+    with LRU eviction. Clients revalidating with the ETag of the response
+    they would get receive a 304 from the gateway instead of the body.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_ttl: float = 300.0):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        # primary key -> (vary header names, per-user) as announced by the last response
+        self._variants: Dict[tuple, Tuple[Tuple[str, ...], bool]] = {}
+        self._by_tag: Dict[str, Set[tuple]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.purged = 0
+        self.not_modified = 0
+        # bumped on every purge so a response fetched across a purge is not stored
+        self.generation = 0
+
+    @staticmethod
+    def primary_key(upstream: str, path: str, request: Request) -> tuple:
+        return (upstream, path, str(request.query_params))
+
+    @staticmethod
+    def _user(request: Request) -> Optional[str]:
+        user = getattr(request.state, "user", None)
+        return user.get("sub") if user else None
+
+    def _variant_key(self, primary: tuple, vary: Tuple[str, ...], per_user: bool, request: Request) -> tuple:
+        scope = self._user(request) if per_user else None
+        return primary + (scope,) + tuple(request.headers.get(name, "") for name in vary)
+
+    def key_for(self, upstream: str, path: str, request: Request) -> tuple:
+        """
+        Full cache key for a request, using the vary/scope rules of the last
+        response seen for it. A key with none yet is treated as shared; see
+        shared() for when such a response may actually be handed to others.
+        """
+        primary = self.primary_key(upstream, path, request)
+        vary, per_user = self._variants.get(primary, ((), False))
+        return self._variant_key(primary, vary, per_user, request)
+
+    def is_known(self, upstream: str, path: str, request: Request) -> bool:
+        return self.primary_key(upstream, path, request) in self._variants
+
+    @staticmethod
+    def shared(response: Response) -> bool:
+        """True when a response says any user may be served it: a cacheable 200, not private, not varying on Cookie."""
+        if response.status_code != 200:
+            return False
+        cc = parse_cache_control(response.headers.get("cache-control"))
+        if "private" in cc or "no-store" in cc or "no-cache" in cc:
+            return False
+        try:
+            if float(cc.get("s-maxage") or cc.get("max-age") or 0) <= 0:
+                return False
+        except ValueError:
+            return False
+        vary = {name.strip().lower() for name in (response.headers.get("vary") or "").split(",")}
+        return not vary & {"*", "cookie"}
+
+    def _remember(self, primary: tuple, vary: Tuple[str, ...], per_user: bool) -> None:
+        if len(self._variants) > 50000:
+            # keep the vary bookkeeping bounded for long tails of distinct query strings
+            self._variants.clear()
+        self._variants[primary] = (vary, per_user)
+
+    @staticmethod
+    def to_response(entry: CachedResponse) -> Response:
+        response = Response(status_code=entry.status_code)
+        response.body = entry.body
+        response.raw_headers = list(entry.headers)
+        response.headers["x-cache"] = "HIT"
+        return response
+
+    def revalidate(self, request: Request, response: Response) -> Response:
+        """A 304 in place of a 200 whose ETag matches the request's If-None-Match."""
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        if not etag_matches(request.headers.get("if-none-match"), response.headers.get("etag")):
+            return response
+        self.not_modified += 1
+        not_modified = Response(status_code=304)
+        not_modified.raw_headers = [
+            (k, v) for k, v in response.raw_headers if k.decode("latin-1") in NOT_MODIFIED_HEADERS or k == b"x-cache"
+        ]
+        return not_modified
+
+    def get(self, upstream: str, path: str, request: Request) -> Optional[CachedResponse]:
+        if "no-cache" in parse_cache_control(request.headers.get("cache-control")):
+            self.misses += 1
+            return None
+        key = self.key_for(upstream, path, request)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, upstream: str, path: str, request: Request, upstream_resp: httpx.Response, proxied: Response, generation: int) -> bool:
+        """
+        Store the client-facing response if the upstream headers allow it.
+
+        generation is the value seen before the upstream call; if a purge ran in
+        the meantime the response may already be stale and is not stored.
+        """
+        upstream_headers = upstream_resp.headers
+        if generation != self.generation or upstream_resp.status_code != 200:
+            return False
+        primary = self.primary_key(upstream, path, request)
+        cc = parse_cache_control(upstream_headers.get("cache-control"))
+        ttl_raw = cc.get("s-maxage") or cc.get("max-age")
+        try:
+            ttl = min(float(ttl_raw), self.max_ttl) if ttl_raw else 0.0
+        except ValueError:
+            ttl = 0.0
+        if "set-cookie" in upstream_headers or "no-store" in cc or "no-cache" in cc or ttl <= 0:
+            # not cacheable, so possibly per user: coalesce it per user from now on
+            self._remember(primary, (), True)
+            return False
+
+        vary_names = []
+        per_user = "private" in cc
+        for name in (upstream_headers.get("vary") or "").split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == "*":
+                self._remember(primary, (), True)
+                return False
+            if name == "cookie":
+                # the gateway already resolved the cookie to a user
+                per_user = True
+                continue
+            vary_names.append(name)
+        vary = tuple(sorted(vary_names))
+        if per_user and self._user(request) is None:
+            self._remember(primary, vary, True)
+            return False
+
+        self._remember(primary, vary, per_user)
+        key = self._variant_key(primary, vary, per_user, request)
+
+        entry = CachedResponse(
+            proxied.status_code,
+            list(proxied.raw_headers),
+            bytes(proxied.body),
+            time.monotonic() + ttl,
+            parse_tags(upstream_headers.get(TAGS_HEADER)),
+        )
+        if entry.size > self.max_bytes:
+            return False
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        self.stores += 1
+        while self.bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def purge(self, tags: Iterable[str]) -> int:
+        self.generation += 1
+        removed = 0
+        for tag in tags:
+            for key in list(self._by_tag.get(tag, ())):
+                if self._remove(key):
+                    removed += 1
+        self.purged += removed
+        return removed
+
+    def _remove(self, key: tuple) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "purged": self.purged,
+            "notModified": self.not_modified,
+            "tags": len(self._by_tag),
+        }
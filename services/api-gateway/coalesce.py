@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+
+SharedResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent requests into one upstream call.
+
+    The first caller for a key (the leader) runs the fetch; callers arriving
+    while it is in flight wait for its result and each get their own copy of
+    the response. If the leader fails the waiters see the same error; if the
+    leader is cancelled or its response is not shareable (it sets cookies, or
+    the caller's shareable() rejects it) the waiters fall back to fetching on
+    their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Any, "asyncio.Future[Optional[SharedResponse]]"] = {}
+        self.leaders = 0
+        self.collapsed = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _share(response: Response) -> Optional[SharedResponse]:
+        if any(k.lower() == b"set-cookie" for k, _ in response.raw_headers):
+            return None
+        return response.status_code, list(response.raw_headers), bytes(response.body)
+
+    @staticmethod
+    def _copy(shared: SharedResponse) -> Response:
+        status_code, raw_headers, body = shared
+        response = Response(status_code=status_code)
+        response.body = body
+        response.raw_headers = list(raw_headers)
+        response.headers["x-coalesced"] = "1"
+        return response
+
+    async def run(
+        self,
+        key: Any,
+        fetch: Callable[[], Awaitable[Response]],
+        shareable: Callable[[Response], bool] = lambda response: True,
+    ) -> Response:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.collapsed += 1
+            shared = await asyncio.shield(pending)
+            if shared is None:
+                self.fallbacks += 1
+                return await fetch()
+            return self._copy(shared)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        self.leaders += 1
+        try:
+            response = await fetch()
+        except asyncio.CancelledError:
+            pending.set_result(None)
+            raise
+        except Exception as exc:
+            pending.set_exception(exc)
+            # mark retrieved so a leader without waiters does not log "never retrieved"
+            pending.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is pending:
+                del self._inflight[key]
+        pending.set_result(self._share(response) if shareable(response) else None)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.collapsed
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "fallbacks": self.fallbacks,
+            "collapseRatio": round(self.collapsed / total, 4) if total else 0.0,
+        }
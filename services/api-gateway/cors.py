@@ -0,0 +1,115 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Everything the route table can forward; preflights are answered for all of them
+PREFLIGHT_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class CorsPreflight:
+    """
+    Precomputed answers to CORS preflights.
+
+    Configured origins form an allow-set; origins that only match the regex are
+    checked once and remembered. Response headers are built once per (origin,
+    requested headers) pair and reused, with a long Access-Control-Max-Age so
+    browsers rarely ask again.
+    """
+
+    def __init__(self, origins: Iterable[str], origin_regex: Optional[str] = None, max_age: int = 86400, max_entries: int = 1024):
+        self.allowed = frozenset(o for o in origins if o)
+        self.regex = re.compile(origin_regex) if origin_regex else None
+        self.max_age = str(max_age).encode("latin-1")
+        self.max_entries = max_entries
+        self._decisions: Dict[bytes, bool] = {}
+        self._responses: Dict[Tuple[bytes, bytes], Headers] = {}
+        self.answered = 0
+        self.rejected = 0
+
+    def allows(self, origin: bytes) -> bool:
+        allowed = self._decisions.get(origin)
+        if allowed is None:
+            text = origin.decode("latin-1")
+            allowed = text in self.allowed or bool(self.regex and self.regex.fullmatch(text))
+            if len(self._decisions) >= self.max_entries:
+                # arbitrary Origin headers must not grow this without bound
+                self._decisions.clear()
+            self._decisions[origin] = allowed
+        return allowed
+
+    def headers(self, origin: bytes, requested_headers: bytes) -> Optional[Headers]:
+        """Response headers for an allowed preflight, or None when the origin is not allowed."""
+        key = (origin, requested_headers)
+        headers = self._responses.get(key)
+        if headers is not None:
+            return headers
+        if not self.allows(origin):
+            return None
+        headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-allow-methods", PREFLIGHT_METHODS),
+            (b"access-control-max-age", self.max_age),
+            (b"vary", b"Origin"),
+        ]
+        if requested_headers:
+            # credentialed requests cannot use "*", so echo what the browser asked for
+            headers.append((b"access-control-allow-headers", requested_headers))
+        if len(self._responses) >= self.max_entries:
+            self._responses.clear()
+        self._responses[key] = headers
+        return headers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "answered": self.answered,
+            "rejected": self.rejected,
+            "allowSet": sorted(self.allowed),
+            "originRegex": self.regex.pattern if self.regex else None,
+            "maxAge": int(self.max_age),
+            "cachedResponses": len(self._responses),
+        }
+
+
+class PreflightMiddleware:
+    """
+    Pure ASGI layer that answers OPTIONS + Access-Control-Request-Method at the
+    edge. Add it last so it runs before metrics, tracing, auth and routing;
+    preflights never reach an upstream. Other requests pass straight through.
+    """
+
+    def __init__(self, app, preflight: CorsPreflight):
+        self.app = app
+        self.preflight = preflight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        origin = request_method = None
+        requested_headers = b""
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+        if origin is None or request_method is None:
+            await self.app(scope, receive, send)
+            return
+        headers = self.preflight.headers(origin, requested_headers)
+        if headers is None:
+            self.preflight.rejected += 1
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        self.preflight.answered += 1
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
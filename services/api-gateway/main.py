@@ -1,10 +1,39 @@
+import asyncio
+import json
 import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote, urlsplit
 
 import httpx
 import jwt
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, StreamingResponse
+
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.events import EventHub, for_user, sse_response
+from common.identity import IDENTITY_HEADER, sign_identity
+from common.metrics import ROUTE_LABEL_KEY, install_metrics
+from common.tracing import TRACEPARENT, install_tracing
+
+from admission import AdmissionController, Overloaded
+from breaker import CircuitBreaker, probe_health
+from batch import BatchItem, BatchRequest, build_subrequest, item_result
+from coalesce import SingleFlight
+from cors import CorsPreflight, PreflightMiddleware
+from cache import PURGE_HEADER, TAGS_HEADER, ResponseCache, parse_tags
+from profiles import ProfileCache, me_from_claims
+from policy import DEFAULT_POLICIES, PolicyTable, load_policies
+from push import relay_events
+from routes import ALL_METHODS, DEFAULT_ROUTES, RouteTable, load_config, path_segments
+from tokens import TokenCache
+from upstreams import UpstreamPool
 
 
 AUTH_UPSTREAM = os.getenv("AUTH_UPSTREAM", "http://localhost:4010")
@@ -15,20 +44,126 @@ MESSAGES_UPSTREAM = os.getenv("MESSAGES_UPSTREAM", "http://localhost:4017")
 LIBRARY_UPSTREAM = os.getenv("LIBRARY_UPSTREAM", "http://localhost:4018")
 ADMIN_UPSTREAM = os.getenv("ADMIN_UPSTREAM", "http://localhost:4019")
 TUTORS_UPSTREAM = os.getenv("TUTORS_UPSTREAM", "http://localhost:4099")
+# Paths whose bodies are piped through instead of buffered (uploads and downloads)
+STREAM_PREFIXES = tuple(
+    p.strip()
+    for p in os.getenv(
+        "GATEWAY_STREAM_PREFIXES",
+        "/students/profile/avatar,/tutors/profile/avatar,/library/resources/",
+    ).split(",")
+    if p.strip()
+)
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
 ALGORITHM = "HS256"
 COOKIE_NAME = "access_token"
+ROUTES_FILE = os.getenv("GATEWAY_ROUTES_FILE")
+TOKEN_CACHE_SIZE = int(os.getenv("GATEWAY_TOKEN_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_TTL = float(os.getenv("GATEWAY_CACHE_MAX_TTL", "300"))
+BATCH_MAX_ITEMS = int(os.getenv("GATEWAY_BATCH_MAX_ITEMS", "20"))
+BATCH_TIMEOUT = float(os.getenv("GATEWAY_BATCH_TIMEOUT", "10"))
+PROBE_INTERVAL = float(os.getenv("GATEWAY_PROBE_INTERVAL", "5"))
+PROBE_TIMEOUT = float(os.getenv("GATEWAY_PROBE_TIMEOUT", "1"))
+COALESCE_GETS = os.getenv("GATEWAY_COALESCE", "1").lower() in {"1", "true", "yes"}
+# Profile fields cached for /auth/me answered at the gateway (0 = answer from JWT claims only)
+ME_PROFILE_TTL = float(os.getenv("GATEWAY_ME_PROFILE_TTL", "300"))
+CORS_ORIGINS = [
+    o.strip()
+    for o in os.getenv(
+        "CORS_ORIGINS",
+        "http://localhost:5173,http://127.0.0.1:5173,http://localhost,http://127.0.0.1,http://172.20.95.15:5173,http://172.20.95.15",
+    ).split(",")
+    if o.strip()
+]
+CORS_ORIGIN_REGEX = os.getenv("CORS_ORIGIN_REGEX", ".*")
+CORS_MAX_AGE = int(os.getenv("GATEWAY_CORS_MAX_AGE", "86400"))
+# Upstreams whose internal event streams are relayed to browsers on GET /events
+EVENT_SOURCES = [s.strip() for s in os.getenv("GATEWAY_EVENT_SOURCES", "tutors,sessions").split(",") if s.strip()]
+
+# One long-lived connection pool per upstream, opened at startup and closed at shutdown
+UPSTREAMS = {
+    "auth": AUTH_UPSTREAM,
+    "students": STUDENTS_UPSTREAM,
+    "users": USERS_UPSTREAM,
+    "sessions": SESSIONS_UPSTREAM,
+    "messages": MESSAGES_UPSTREAM,
+    "library": LIBRARY_UPSTREAM,
+    "admin": ADMIN_UPSTREAM,
+    "tutors": TUTORS_UPSTREAM,
+}
+# Adding a service is a config change: extra upstreams/routes come from GATEWAY_ROUTES_FILE
+EXTRA_UPSTREAMS, EXTRA_ROUTES = load_config(ROUTES_FILE)
+UPSTREAMS.update(EXTRA_UPSTREAMS)
+ROUTE_TABLE = RouteTable(DEFAULT_ROUTES + EXTRA_ROUTES)
+_unknown = {r.upstream for r in ROUTE_TABLE.routes} - UPSTREAMS.keys()
+if _unknown:
+    raise RuntimeError(f"gateway routes point at unknown upstreams: {sorted(_unknown)}")
+POOLS = {name: UpstreamPool.from_env(name, url) for name, url in UPSTREAMS.items()}
+# Route -> role rules checked against the decoded JWT before any upstream call
+POLICY_TABLE = PolicyTable(DEFAULT_POLICIES + load_policies(ROUTES_FILE))
+# Per-upstream concurrency limit + bounded queue, so one slow service cannot stall the rest
+ADMISSION = {name: AdmissionController.from_env(name) for name in UPSTREAMS}
+# Fail fast on upstreams that are erroring or too slow, with background /health probes
+BREAKERS = {name: CircuitBreaker.from_env(name) for name in UPSTREAMS}
+
+# Tokens that already passed HMAC verification, so polling clients skip jwt.decode
+TOKEN_CACHE = TokenCache(max_entries=TOKEN_CACHE_SIZE)
+
+# Auth-service user objects (from login and /me responses) that enrich /auth/me answered from claims
+PROFILE_CACHE = ProfileCache(ttl=ME_PROFILE_TTL, max_entries=TOKEN_CACHE_SIZE)
+
+# GET responses upstreams marked cacheable; purged by the tags they emit on writes
+RESPONSE_CACHE = ResponseCache(max_bytes=RESPONSE_CACHE_BYTES, max_ttl=RESPONSE_CACHE_MAX_TTL)
+
+# Identical concurrent GETs (same upstream, path, query and cache scope) share one upstream call
+SINGLE_FLIGHT = SingleFlight()
+
+# Push fan-out: one relay connection per event source, one bounded queue per browser
+EVENT_HUB = EventHub()
+
+# Preflights answered at the edge from the origin allow-set; CORSMiddleware still decorates real responses
+PREFLIGHT = CorsPreflight(CORS_ORIGINS, CORS_ORIGIN_REGEX or None, max_age=CORS_MAX_AGE)
+
+
+def service_headers() -> Dict[str, str]:
+    """Short-lived SERVICE token for the gateway's own calls to upstream internal endpoints."""
+    token = jwt.encode(
+        {"sub": "api-gateway", "role": "SERVICE", "exp": int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm=ALGORITHM,
+    )
+    return {"cookie": f"{COOKIE_NAME}={token}"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for pool in POOLS.values():
+        pool.start()
+    prober = None
+    if PROBE_INTERVAL > 0:
+        prober = asyncio.create_task(probe_health(POOLS, BREAKERS, PROBE_INTERVAL, PROBE_TIMEOUT))
+    # each replica publishes only the changes it handled, so listen to all of them
+    relays = [
+        asyncio.create_task(relay_events(POOLS[name], EVENT_HUB, service_headers, replica))
+        for name in EVENT_SOURCES
+        if name in POOLS
+        for replica in POOLS[name].replicas
+    ]
+    yield
+    if prober is not None:
+        prober.cancel()
+    for relay in relays:
+        relay.cancel()
+    for pool in POOLS.values():
+        await pool.close()
+
+
+app = FastAPI(title="API Gateway", version="1.0.0", lifespan=lifespan)
 
-app = FastAPI(title="API Gateway", version="1.0.0")
-
-origins = os.getenv(
-    "CORS_ORIGINS",
-    "http://localhost:5173,http://127.0.0.1:5173,http://localhost,http://127.0.0.1,http://172.20.95.15:5173,http://172.20.95.15",
-).split(",")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in origins if o],
-    allow_origin_regex=".*",
+    allow_origins=CORS_ORIGINS,
+    allow_origin_regex=CORS_ORIGIN_REGEX or None,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -37,175 +172,456 @@ app.add_middleware(
 
 @app.middleware("http")
 async def auth_guard(request: Request, call_next):
-    path = request.url.path
+    segments = path_segments(request.url.path)
+    if segments is None:
+        return JSONResponse(status_code=400, content={"error": "invalid path"})
+    path = "/" + "/".join(segments)
+    if path != request.url.path:
+        # one spelling of the path for the policy check, routing and cache keys below
+        request.scope["path"] = path
+        request.scope["raw_path"] = quote(path).encode("ascii")
     if request.method == "OPTIONS":
         return await call_next(request)
-    if path.startswith("/auth") or path in {"/health", "/students/health", "/tutors/health"}:
+    if path.startswith("/auth") or path.startswith("/health") or path in {"/metrics", "/students/health", "/tutors/health"}:
         return await call_next(request)
 
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        return JSONResponse(status_code=401, content={"error": "unauthorized"})
-
-    try:
-        #request.state.user = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        request.state.user = payload
-        
-        # PHÂN QUYỀN ADMIN - QUAN TRỌNG
-        user_role = payload.get("role")
-        
-        # Nếu truy cập admin routes mà không phải admin
-        if path.startswith("/admin/api/") and user_role != "ADMIN":
-            return JSONResponse(
-                status_code=403, 
-                content={"error": "forbidden", "message": "Admin access required"}
-            )
-    except jwt.InvalidTokenError:
+    payload = verified_claims(request)
+    if payload is None:
         return JSONResponse(status_code=401, content={"error": "unauthorized"})
+    request.state.user = payload
 
+    denied = route_access_error(request.method, path, payload)
+    if denied is not None:
+        return denied
     return await call_next(request)
 
 
-@app.get("/health")
-async def health():
-    return {"ok": True, "svc": "api-gateway"}
-
-
-async def proxy_request(target: str, path: str, request: Request) -> Response:
-    url = target.rstrip("/")
-    if path:
-        url = f"{url}/{path.lstrip('/')}"
-
-    headers = {
-        k: v
-        for k, v in request.headers.items()
-        if k.lower() not in {"host", "content-length"}
-    }
-
-    body = await request.body()
-
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        upstream_resp = await client.request(
-            request.method,
-            url,
-            params=request.query_params,
-            headers=headers,
-            content=body,
-            cookies=request.cookies,
-        )
-
-    proxied = Response(
-        content=upstream_resp.content,
-        status_code=upstream_resp.status_code,
-        media_type=upstream_resp.headers.get("content-type"),
+def verified_claims(request: Request) -> Optional[Dict[str, Any]]:
+    """JWT payload from the access_token cookie, or None when it is missing or invalid."""
+    token = request.cookies.get(COOKIE_NAME)
+    if not token:
+        return None
+    payload = TOKEN_CACHE.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+        except jwt.InvalidTokenError:
+            return None
+        TOKEN_CACHE.put(token, payload)
+    return payload
+
+
+def route_access_error(method: str, path: str, payload: Dict[str, Any]) -> Optional[JSONResponse]:
+    # PHÂN QUYỀN - QUAN TRỌNG: role-restricted routes are rejected here, not after an upstream hop
+    rule = POLICY_TABLE.match(method, path)
+    if rule is None or rule.check(payload.get("role")):
+        return None
+    return JSONResponse(
+        status_code=403,
+        content={"error": "forbidden", "message": rule.message}
     )
 
-    for key, value in upstream_resp.headers.items():
-        if key.lower() in {"content-length", "transfer-encoding", "connection"}:
-            continue
-        if key.lower() == "set-cookie":
-            continue
-        proxied.headers[key] = value
-
-    for cookie_header in upstream_resp.headers.get_list("set-cookie"):
-        proxied.headers.append("set-cookie", cookie_header)
 
-    return proxied
+def sticky_key(request: Request) -> Optional[str]:
+    """User id for sticky replica routing; anonymous requests are balanced freely."""
+    user = getattr(request.state, "user", None)
+    return user.get("sub") if user else None
+
+
+# installed after auth_guard so it wraps it and also counts rejected requests
+METRICS = install_metrics(app, "api-gateway")
+TRACER = install_tracing(app, "api-gateway")
+# added last so it is outermost: preflights skip metrics, tracing, auth_guard and upstreams
+app.add_middleware(PreflightMiddleware, preflight=PREFLIGHT)
+
+
+def gateway_metrics():
+    """Pool, admission, breaker and cache counters, exported on /metrics next to request timings."""
+    pools = [(name, pool.stats(), ADMISSION[name].stats(), BREAKERS[name].stats()) for name, pool in POOLS.items()]
+    yield "gateway_upstream_requests_total", "counter", "Requests sent through each upstream pool.", [
+        ({"upstream": name}, p["requests"]) for name, p, _, _ in pools
+    ]
+    yield "gateway_upstream_new_connections_total", "counter", "Requests that had to open a new upstream connection.", [
+        ({"upstream": name}, p["poolMisses"]) for name, p, _, _ in pools
+    ]
+    yield "gateway_upstream_errors_total", "counter", "Connection-level upstream failures.", [
+        ({"upstream": name}, p["errors"]) for name, p, _, _ in pools
+    ]
+    yield "gateway_replica_healthy", "gauge", "1 while a replica is in rotation, 0 after failed probes or connections.", [
+        ({"upstream": name, "replica": r["url"]}, int(r["healthy"])) for name, p, _, _ in pools for r in p["replicas"]
+    ]
+    yield "gateway_replica_outstanding", "gauge", "Requests in flight to each replica.", [
+        ({"upstream": name, "replica": r["url"]}, r["outstanding"]) for name, p, _, _ in pools for r in p["replicas"]
+    ]
+    yield "gateway_replica_requests_total", "counter", "Requests sent to each replica.", [
+        ({"upstream": name, "replica": r["url"]}, r["requests"]) for name, p, _, _ in pools for r in p["replicas"]
+    ]
+    yield "gateway_admission_active", "gauge", "Requests holding an upstream concurrency slot.", [
+        ({"upstream": name}, a["active"]) for name, _, a, _ in pools
+    ]
+    yield "gateway_admission_queue_depth", "gauge", "Requests waiting for an upstream concurrency slot.", [
+        ({"upstream": name}, a["queueDepth"]) for name, _, a, _ in pools
+    ]
+    yield "gateway_admission_shed_total", "counter", "Requests shed by admission control.", [
+        ({"upstream": name, "reason": reason}, a[key])
+        for name, _, a, _ in pools
+        for reason, key in (("queue_full", "shedQueueFull"), ("timeout", "shedTimeout"))
+    ]
+    yield "gateway_breaker_open", "gauge", "1 while the upstream circuit is open, 0.5 half-open, 0 closed.", [
+        ({"upstream": name}, {"open": 1, "half_open": 0.5}.get(b["state"], 0)) for name, _, _, b in pools
+    ]
+    yield "gateway_breaker_rejected_total", "counter", "Requests failed fast by an open circuit.", [
+        ({"upstream": name}, b["rejected"]) for name, _, _, b in pools
+    ]
+    cache = RESPONSE_CACHE.stats()
+    tokens = TOKEN_CACHE.stats()
+    profiles = PROFILE_CACHE.stats()
+    flights = SINGLE_FLIGHT.stats()
+    yield "gateway_cache_lookups_total", "counter", "Response cache lookups by result.", [
+        ({"cache": "response", "result": "hit"}, cache["hits"]),
+        ({"cache": "response", "result": "miss"}, cache["misses"]),
+        ({"cache": "token", "result": "hit"}, tokens["hits"]),
+        ({"cache": "token", "result": "miss"}, tokens["misses"]),
+        ({"cache": "profile", "result": "hit"}, profiles["hits"]),
+        ({"cache": "profile", "result": "miss"}, profiles["misses"]),
+    ]
+    yield "gateway_cache_bytes", "gauge", "Bytes held by the response cache.", [({}, cache["bytes"])]
+    yield "gateway_coalesced_requests_total", "counter", "GETs served from another in-flight request.", [
+        ({}, flights["collapsed"])
+    ]
+    push = EVENT_HUB.stats()
+    yield "gateway_push_subscribers", "gauge", "Open GET /events connections.", [({}, push["subscribers"])]
+    yield "gateway_push_events_total", "counter", "Events relayed to the push hub.", [({}, push["published"])]
+    yield "gateway_cors_preflights_total", "counter", "CORS preflights answered at the edge, by result.", [
+        ({"result": "answered"}, PREFLIGHT.answered),
+        ({"result": "rejected"}, PREFLIGHT.rejected),
+    ]
+    rules = POLICY_TABLE.stats()
+    yield "gateway_policy_decisions_total", "counter", "Route policy checks by rule and result.", [
+        ({"rule": r["rule"], "result": result}, r[result]) for r in rules for result in ("allowed", "denied")
+    ]
+
+
+METRICS.add_collector(gateway_metrics)
 
 
-@app.api_route("/auth", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def auth_root(request: Request):
-    return await proxy_request(AUTH_UPSTREAM, "", request)
+@app.get("/health")
+async def health():
+    return {"ok": True, "svc": "api-gateway"}
 
 
-@app.api_route("/auth/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def auth_proxy(path: str, request: Request):
-    return await proxy_request(AUTH_UPSTREAM, path, request)
+@app.get("/health/upstreams")
+async def upstreams_health():
+    return {
+        "ok": True,
+        "pools": [
+            {**pool.stats(), "admission": ADMISSION[name].stats(), "breaker": BREAKERS[name].stats()}
+            for name, pool in POOLS.items()
+        ],
+    }
 
 
-@app.api_route("/students", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def students_root(request: Request):
-    return await proxy_request(STUDENTS_UPSTREAM, "", request)
+@app.get("/health/token-cache")
+async def token_cache_health():
+    return {"ok": True, "tokenCache": TOKEN_CACHE.stats()}
 
 
-@app.api_route("/students/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def students_proxy(path: str, request: Request):
-    return await proxy_request(STUDENTS_UPSTREAM, path, request)
+@app.get("/health/cache")
+async def response_cache_health():
+    return {"ok": True, "cache": RESPONSE_CACHE.stats()}
 
 
+@app.get("/health/coalescing")
+async def coalescing_health():
+    return {"ok": True, "enabled": COALESCE_GETS, "singleFlight": SINGLE_FLIGHT.stats()}
 
-@app.api_route("/sessions/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def sessions_proxy(path: str, request: Request):
-    return await proxy_request(SESSIONS_UPSTREAM, path, request)
 
-@app.api_route("/sessions", methods=["GET"])
-async def sessions_root(request: Request):
-    return await proxy_request(SESSIONS_UPSTREAM, "", request)
+@app.get("/health/events")
+async def events_health():
+    return {"ok": True, "sources": EVENT_SOURCES, "hub": EVENT_HUB.stats()}
 
-@app.api_route("/messaging/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def messaging_proxy(path: str, request: Request):
-    return await proxy_request(MESSAGES_UPSTREAM, path, request)
 
+@app.get("/health/policy")
+async def policy_health():
+    return {"ok": True, "rules": POLICY_TABLE.stats()}
 
-@app.api_route("/messaging", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def messaging_root(request: Request):
-    return await proxy_request(MESSAGES_UPSTREAM, "", request)
 
-@app.api_route("/library/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def library_proxy(path: str, request: Request):
-    return await proxy_request(LIBRARY_UPSTREAM, path, request)
+@app.get("/health/profile-cache")
+async def profile_cache_health():
+    return {"ok": True, "profileCache": PROFILE_CACHE.stats()}
 
 
-@app.api_route("/users/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def users_proxy(path: str, request: Request):
-    return await proxy_request(USERS_UPSTREAM, path, request)
+@app.get("/health/cors")
+async def cors_health():
+    return {"ok": True, "preflight": PREFLIGHT.stats()}
 
-@app.api_route("/tutors/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def tutors_proxy(path: str, request: Request):
-    return await proxy_request(TUTORS_UPSTREAM, path, request)
 
+def copy_upstream_headers(upstream_resp: httpx.Response, proxied: Response, streaming: bool) -> None:
+    skip = {"transfer-encoding", "connection", "set-cookie", TAGS_HEADER, PURGE_HEADER}
+    if not streaming:
+        # body was decoded by httpx, so the upstream length/encoding no longer apply
+        skip |= {"content-length", "content-encoding"}
+    for key, value in upstream_resp.headers.items():
+        if key.lower() in skip:
+            continue
+        proxied.headers[key] = value
 
-@app.api_route("/tutors", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def tutors_root(request: Request):
-    return await proxy_request(TUTORS_UPSTREAM, "", request)
+    for cookie_header in upstream_resp.headers.get_list("set-cookie"):
+        proxied.headers.append("set-cookie", cookie_header)
 
-# Admin API routes - chỉ admin mới được truy cập
-@app.api_route("/admin/api/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def admin_api_proxy(path: str, request: Request):
-    return await proxy_request(ADMIN_UPSTREAM, f"api/{path}", request)
 
-# Public ingest for non-admin (still requires auth via middleware)
-@app.api_route("/admin/ingest/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def admin_ingest_proxy(path: str, request: Request):
-    return await proxy_request(ADMIN_UPSTREAM, f"api/{path}", request)
+async def proxy_request(upstream: str, path: str, request: Request, stream: Optional[bool] = None) -> Response:
+    if stream is None:
+        stream = request.url.path.startswith(STREAM_PREFIXES)
+
+    cacheable = request.method == "GET" and not stream
+    if not cacheable:
+        return await forward_request(upstream, path, request, stream, cacheable)
+
+    cached = RESPONSE_CACHE.get(upstream, path, request)
+    if cached is not None:
+        return RESPONSE_CACHE.revalidate(request, RESPONSE_CACHE.to_response(cached))
+    if not COALESCE_GETS:
+        return RESPONSE_CACHE.revalidate(request, await forward_request(upstream, path, request, stream, cacheable))
+    # key on the cache scope so only requests that could share a cache entry are collapsed.
+    # A key with no response seen yet collapses across users (the cold burst on a new
+    # session), but the leader's reply only reaches them if it says it is public.
+    key = RESPONSE_CACHE.key_for(upstream, path, request)
+    shareable = (lambda response: True) if RESPONSE_CACHE.is_known(upstream, path, request) else RESPONSE_CACHE.shared
+    response = await SINGLE_FLIGHT.run(key, lambda: forward_request(upstream, path, request, stream, cacheable), shareable)
+    return RESPONSE_CACHE.revalidate(request, response)
+
+
+async def forward_request(upstream: str, path: str, request: Request, stream: bool, cacheable: bool) -> Response:
+    pool = POOLS[upstream]
+    generation = RESPONSE_CACHE.generation
+
+    # the browser's Cookie header is forwarded as-is; when streaming, content-length
+    # is kept too so upstream gets a sized (not chunked) body. A client-supplied
+    # identity header is never passed on.
+    drop = {"host", IDENTITY_HEADER} if stream else {"host", "content-length", IDENTITY_HEADER}
+    if cacheable:
+        # fetch the full body so it can be cached and shared; proxy_request answers the
+        # client's If-None-Match itself
+        drop.add("if-none-match")
+    headers = {
+        k: v
+        for k, v in request.headers.items()
+        if k.lower() not in drop
+    }
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        # already verified here, so services can skip their own jwt.decode
+        headers[IDENTITY_HEADER] = sign_identity(user)
+
+    if stream:
+        body = request.stream() if request.method in {"POST", "PUT", "PATCH"} else None
+    else:
+        body = await request.body()
+
+    breaker = BREAKERS[upstream]
+    if not breaker.allow():
+        return JSONResponse(
+            status_code=503,
+            content={"error": "upstream unavailable", "upstream": upstream, "reason": "circuit open"},
+            headers={"Retry-After": str(breaker.retry_after())},
+        )
+    admission = ADMISSION[upstream]
+    queued = time.monotonic()
+    try:
+        await admission.acquire()
+    except Overloaded as exc:
+        breaker.cancel()
+        return JSONResponse(
+            status_code=503,
+            content={"error": "overloaded", "upstream": exc.upstream, "reason": exc.reason},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    except BaseException:
+        # cancelled while queued (client gone, /batch timeout): hand back a half-open trial slot
+        breaker.cancel()
+        raise
+    started = time.monotonic()
+    # client span for this hop; upstream continues the trace from the traceparent we send
+    span = TRACER.start_span(f"{request.method} {upstream}", "client")
+    span.attributes.update({"peer": upstream, "http.target": "/" + path, "queueMs": round((started - queued) * 1000, 3)})
+    headers[TRACEPARENT] = span.traceparent
+    try:
+        upstream_resp = await pool.send(
+            request.method,
+            path,
+            stream=stream,
+            key=sticky_key(request),
+            params=request.query_params,
+            headers=headers,
+            content=body,
+        )
+    except httpx.RequestError as exc:
+        admission.release()
+        elapsed = time.monotonic() - started
+        breaker.record(False, elapsed)
+        METRICS.observe_upstream(upstream, elapsed, None)
+        span.error = type(exc).__name__
+        span.end()
+        print(f"[gateway] {upstream} request failed: {exc!r}")
+        return JSONResponse(status_code=502, content={"error": "upstream unavailable", "upstream": upstream})
+    except BaseException as exc:
+        admission.release()
+        breaker.cancel()
+        span.error = type(exc).__name__
+        span.end()
+        raise
+    elapsed = time.monotonic() - started
+    breaker.record(upstream_resp.status_code < 500, elapsed)
+    METRICS.observe_upstream(upstream, elapsed, upstream_resp.status_code)
+    span.status = upstream_resp.status_code
+    span.end()
+
+    if stream:
+        released = False
+
+        async def finish_stream() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            try:
+                await upstream_resp.aclose()
+            finally:
+                pool.release(upstream_resp)
+                admission.release()
+
+        async def relay():
+            try:
+                async for chunk in upstream_resp.aiter_raw():
+                    yield chunk
+            finally:
+                await finish_stream()
+
+        # the slot stays taken until the streamed body has been relayed; the background
+        # task covers responses whose body iterator never started
+        proxied = StreamingResponse(
+            relay(),
+            status_code=upstream_resp.status_code,
+            media_type=upstream_resp.headers.get("content-type"),
+            background=BackgroundTask(finish_stream),
+        )
+    else:
+        admission.release()
+        proxied = Response(
+            content=upstream_resp.content,
+            status_code=upstream_resp.status_code,
+            media_type=upstream_resp.headers.get("content-type"),
+        )
 
-# Admin static files - công khai
-@app.api_route("/admin/static/{path:path}", methods=["GET"])
-async def admin_static_proxy(path: str, request: Request):
-    return await proxy_request(ADMIN_UPSTREAM, f"static/{path}", request)
+    copy_upstream_headers(upstream_resp, proxied, streaming=stream)
 
-@app.api_route("/bookings", methods=["GET", "POST"])
-async def bookings_root(request: Request):
-    """Route /bookings to Tutors service"""
-    return await proxy_request(TUTORS_UPSTREAM, "bookings", request)
+    purge_tags = parse_tags(upstream_resp.headers.get(PURGE_HEADER))
+    if purge_tags:
+        RESPONSE_CACHE.purge(purge_tags)
+    if cacheable and RESPONSE_CACHE.store(upstream, path, request, upstream_resp, proxied, generation):
+        proxied.headers["x-cache"] = "MISS"
+    return proxied
 
 
-@app.api_route("/bookings/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def bookings_proxy(path: str, request: Request):
-    """Route /bookings/* to Tutors service"""
-    return await proxy_request(TUTORS_UPSTREAM, f"bookings/{path}", request)
+async def dispatch_request(request: Request, stream: Optional[bool] = None) -> Response:
+    matched = ROUTE_TABLE.match(request.url.path)
+    if matched is None:
+        request.scope[ROUTE_LABEL_KEY] = "unmatched"
+        return JSONResponse(status_code=404, content={"error": "not found"})
+    route, upstream_path = matched
+    # label metrics by route prefix rather than the catch-all path template
+    request.scope[ROUTE_LABEL_KEY] = route.prefix
+    if not route.allows(request.method, request.url.path):
+        return JSONResponse(status_code=405, content={"error": "method not allowed"})
+    return await proxy_request(route.upstream, upstream_path, request, stream=stream)
+
+
+async def run_batch_item(parent: Request, item: BatchItem) -> Dict[str, Any]:
+    if path_segments(urlsplit(item.path).path) is None:
+        return {"id": item.id, "status": 400, "body": {"error": "invalid path"}}
+    sub_request = build_subrequest(parent, item)
+    # sub-requests skip the middleware, so apply the same route checks auth_guard would
+    denied = route_access_error(sub_request.method, sub_request.url.path, parent.state.user)
+    if denied is not None:
+        return item_result(item.id, denied)
+    try:
+        response = await asyncio.wait_for(dispatch_request(sub_request, stream=False), BATCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"id": item.id, "status": 504, "body": {"error": "upstream timeout"}}
+    except httpx.RequestError:
+        return {"id": item.id, "status": 502, "body": {"error": "upstream unavailable"}}
+    return item_result(item.id, response)
+
+
+@app.post("/batch")
+async def batch(body: BatchRequest, request: Request):
+    """Run several gateway requests concurrently behind one auth check."""
+    if len(body.requests) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "too many sub-requests", "max": BATCH_MAX_ITEMS},
+        )
+    results = await asyncio.gather(*(run_batch_item(request, item) for item in body.requests))
+    return {"ok": True, "results": results}
 
-@app.api_route("/admin/bookings", methods=["GET"])
-async def admin_bookings_root(request: Request):
-    """Route /admin/bookings to Tutors service"""
-    return await proxy_request(TUTORS_UPSTREAM, "admin/bookings", request)
 
+def remember_profile(response: Response) -> Optional[Dict[str, Any]]:
+    """Cache the user object from an auth-service login or /me response."""
+    try:
+        user = json.loads(response.body).get("user")
+    except (AttributeError, ValueError):
+        return None
+    if not isinstance(user, dict):
+        return None
+    PROFILE_CACHE.put(user)
+    return user
+
+
+@app.post("/auth/login")
+async def login(request: Request):
+    """Proxied to the auth service; the user it returns refreshes the profile cache."""
+    response = await dispatch_request(request)
+    if response.status_code == 200 and PROFILE_CACHE.enabled:
+        remember_profile(response)
+    return response
+
+
+@app.get("/auth/me")
+async def auth_me(request: Request):
+    """
+    Answered at the gateway from the verified JWT claims. Profile fields that
+    are not in the token come from the profile cache; a miss costs one call
+    to the auth service, which refills it.
+    """
+    claims = verified_claims(request)
+    if claims is None:
+        return JSONResponse(status_code=401, content={"detail": "unauthorized"})
+    request.state.user = claims
+    if not PROFILE_CACHE.enabled:
+        return {"ok": True, "user": me_from_claims(claims)}
+    profile = PROFILE_CACHE.get(claims.get("sub"))
+    if profile is None or profile.get("role") != claims.get("role"):
+        response = await dispatch_request(request)
+        if response.status_code != 200:
+            return response
+        profile = remember_profile(response)
+        if profile is None:
+            return response
+    return {"ok": True, "user": me_from_claims(claims, profile)}
+
+
+@app.get("/events")
+async def events(request: Request):
+    """Server-sent booking and session changes addressed to the signed-in user."""
+    return sse_response(EVENT_HUB, for_user(request.state.user))
+
+
+@app.api_route("/{full_path:path}", methods=sorted(ALL_METHODS))
+async def dispatch(full_path: str, request: Request):
+    """Single catch-all: resolve the upstream from the route table and proxy."""
+    return await dispatch_request(request)
 
-@app.api_route("/admin/bookings/{path:path}", methods=["GET"])
-async def admin_bookings_proxy(path: str, request: Request):
-    """Route /admin/bookings/* to Tutors service"""
-    return await proxy_request(TUTORS_UPSTREAM, f"admin/bookings/{path}", request)
 
 if __name__ == "__main__":
     import uvicorn
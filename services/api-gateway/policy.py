@@ -0,0 +1,107 @@
+import json
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from routes import ALL_METHODS, path_segments
+
+# Gateway path prefix -> roles allowed, mirroring the require_* checks of the upstream
+# handlers so forbidden calls are answered at the edge. "*" matches one path segment;
+# "exact" rules only apply to the prefix itself, not to paths below it.
+DEFAULT_POLICIES: List[Dict[str, Any]] = [
+    {"prefix": "/admin/api", "roles": ["ADMIN"], "message": "Admin access required"},
+    {"prefix": "/admin/bookings", "roles": ["ADMIN"]},
+    {"prefix": "/sessions/availability", "roles": ["TUTOR"]},
+    {"prefix": "/sessions/tutor", "roles": ["TUTOR"]},
+    {"prefix": "/sessions/*/status", "roles": ["TUTOR"], "methods": ["PUT"]},
+    {"prefix": "/sessions/internal", "roles": ["SERVICE"]},
+    {"prefix": "/tutors/profile", "roles": ["TUTOR"]},
+    {"prefix": "/tutors/tutor", "roles": ["TUTOR"]},
+    {"prefix": "/tutors/admin", "roles": ["ADMIN"]},
+    {"prefix": "/tutors/internal", "roles": ["SERVICE"]},
+    # GET /bookings/{id} is open to any signed-in user; listing and writes are for students
+    {"prefix": "/tutors/bookings", "roles": ["STUDENT"], "methods": ["POST"]},
+    {"prefix": "/tutors/bookings", "roles": ["STUDENT"], "methods": ["GET"], "exact": True},
+    {"prefix": "/bookings", "roles": ["STUDENT"], "methods": ["POST"]},
+    {"prefix": "/bookings", "roles": ["STUDENT"], "methods": ["GET"], "exact": True},
+    {"prefix": "/students", "roles": ["STUDENT"]},
+]
+
+WILDCARD = "*"
+
+
+class Rule:
+    __slots__ = ("prefix", "roles", "methods", "exact", "message", "allowed", "denied")
+
+    def __init__(self, prefix: str, roles: Iterable[str], methods: Optional[Iterable[str]] = None, exact: bool = False, message: Optional[str] = None):
+        self.prefix = "/" + prefix.strip("/")
+        self.roles: FrozenSet[str] = frozenset(roles)
+        self.methods: FrozenSet[str] = frozenset(m.upper() for m in methods) if methods else ALL_METHODS
+        self.exact = exact
+        self.message = message or " or ".join(sorted(r.lower() for r in self.roles)) + " access required"
+        self.allowed = 0
+        self.denied = 0
+
+    @property
+    def name(self) -> str:
+        methods = "*" if self.methods == ALL_METHODS else ",".join(sorted(self.methods))
+        return f"{methods} {self.prefix}{'' if self.exact else '/**'}"
+
+    def check(self, role: Optional[str]) -> bool:
+        if role in self.roles:
+            self.allowed += 1
+            return True
+        self.denied += 1
+        return False
+
+
+class PolicyTable:
+    """
+    Route -> role rules over the same segment trie as RouteTable.
+
+    The most specific rule (longest prefix) that covers the request method
+    decides; a path no rule covers is left to the upstream. Paths are split
+    with path_segments(), as RouteTable splits them.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        self._root: Dict[Optional[str], Any] = {}
+        self.rules: List[Rule] = []
+        for spec in rules:
+            self.add(Rule(spec["prefix"], spec["roles"], spec.get("methods"), spec.get("exact", False), spec.get("message")))
+
+    def add(self, rule: Rule) -> None:
+        node = self._root
+        for segment in rule.prefix.strip("/").split("/"):
+            node = node.setdefault(segment, {})
+        node.setdefault(None, []).append(rule)
+        self.rules.append(rule)
+
+    def match(self, method: str, path: str) -> Optional[Rule]:
+        segments = path_segments(path)
+        if segments is None:
+            # never routed either (RouteTable.match rejects it); nothing to allow
+            return None
+        nodes = [self._root]
+        best: Optional[Rule] = None
+        for depth, segment in enumerate(segments, 1):
+            nodes = [child for node in nodes for child in (node.get(segment), node.get(WILDCARD)) if child is not None]
+            if not nodes:
+                break
+            for node in nodes:
+                for rule in node.get(None, ()):
+                    if method in rule.methods and (not rule.exact or depth == len(segments)):
+                        best = rule
+        return best
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"rule": rule.name, "roles": sorted(rule.roles), "allowed": rule.allowed, "denied": rule.denied}
+            for rule in self.rules
+        ]
+
+
+def load_policies(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Extra rules from the "policies" list of the GATEWAY_ROUTES_FILE JSON ({"prefix", "roles", "methods", "exact", "message"})."""
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return list(json.load(fh).get("policies") or [])
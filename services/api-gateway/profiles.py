@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Fields of the auth service's user object that are not in the JWT claims
+PROFILE_FIELDS = ("phone", "major")
+
+
+class ProfileCache:
+    """
+    Short-TTL LRU of auth-service user objects, keyed by user id.
+
+    Filled from the auth service's own responses (login and /me), so the
+    gateway can answer /auth/me from verified claims plus these extra fields
+    without a hop to the auth service on every page load.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: Dict[str, Any]) -> None:
+        user_id = user.get("id")
+        if not self.enabled or not user_id:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        self.refreshes += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def me_from_claims(claims: Dict[str, Any], profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The auth service's /me user object, built from verified JWT claims (identity) and a cached profile (extra fields)."""
+    user = {
+        "id": claims.get("sub"),
+        "email": claims.get("email"),
+        "role": claims.get("role"),
+        "name": claims.get("name"),
+    }
+    for field in PROFILE_FIELDS:
+        user[field] = profile.get(field) if profile else None
+    return user
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from common.events import EVERYONE, EventHub, read_sse
+from upstreams import Replica, UpstreamPool
+
+# Upstream endpoint streaming that service's events (full frames, audience included)
+EVENTS_PATH = "internal/events"
+
+
+async def relay_events(
+    pool: UpstreamPool,
+    hub: EventHub,
+    auth_headers: Callable[[], Dict[str, str]],
+    replica: Optional[Replica] = None,
+    max_backoff: float = 30.0,
+) -> None:
+    """
+    Keep one SSE connection open to an upstream's event stream (one replica of
+    it, when given) and republish its events into the gateway hub,
+    reconnecting with backoff.
+
+    Browsers subscribe to the gateway hub, so each upstream replica only ever
+    serves one push connection no matter how many users are listening.
+    """
+    source = replica.url if replica is not None else pool.name
+    backoff = 1.0
+    while True:
+        try:
+            async with pool.client.stream(
+                "GET",
+                pool.url(EVENTS_PATH, replica),
+                headers=auth_headers(),
+                timeout=httpx.Timeout(None, connect=pool.connect_timeout),
+            ) as resp:
+                resp.raise_for_status()
+                backoff = 1.0
+                # anything published while we were disconnected is lost, so have clients refetch
+                hub.publish("resync", {"source": pool.name}, roles=[EVERYONE])
+                async for event in read_sse(resp.aiter_lines()):
+                    # renumbered by the gateway hub; upstream ids would collide across services
+                    event.pop("id", None)
+                    hub.publish_event(event)
+        except (httpx.HTTPError, ValueError) as exc:
+            print(f"[gateway] event stream from {source} dropped: {exc!r}")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ALL_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE"})
+
+
+def path_segments(path: str) -> Optional[List[str]]:
+    """
+    Segments of a request path with empty and "." ones dropped, so "/a//b/./c"
+    and "/a/b/c" route and are authorized alike; None when a ".." segment
+    appears, since an upstream URL could climb out of the matched prefix.
+    """
+    segments = [segment for segment in path.split("/") if segment not in ("", ".")]
+    if ".." in segments:
+        return None
+    return segments
+
+# prefix -> upstream service, with the upstream path prefix the remainder is appended to.
+# "methods" limits the verbs for paths under the prefix, "rootMethods" those for the prefix itself.
+DEFAULT_ROUTES: List[Dict[str, Any]] = [
+    {"prefix": "/auth", "upstream": "auth"},
+    {"prefix": "/students", "upstream": "students"},
+    {"prefix": "/users", "upstream": "users"},
+    {"prefix": "/sessions", "upstream": "sessions", "rootMethods": ["GET"]},
+    {"prefix": "/messaging", "upstream": "messages"},
+    {"prefix": "/library", "upstream": "library"},
+    {"prefix": "/tutors", "upstream": "tutors"},
+    {"prefix": "/bookings", "upstream": "tutors", "rewrite": "bookings", "methods": ["GET", "POST", "PUT", "DELETE"], "rootMethods": ["GET", "POST"]},
+    {"prefix": "/admin/api", "upstream": "admin", "rewrite": "api"},
+    # public ingest for non-admin users (still authenticated)
+    {"prefix": "/admin/ingest", "upstream": "admin", "rewrite": "api"},
+    {"prefix": "/admin/static", "upstream": "admin", "rewrite": "static", "methods": ["GET"]},
+    {"prefix": "/admin/bookings", "upstream": "tutors", "rewrite": "admin/bookings", "methods": ["GET"]},
+]
+
+
+class Route:
+    __slots__ = ("prefix", "upstream", "rewrite", "methods", "root_methods")
+
+    def __init__(
+        self,
+        prefix: str,
+        upstream: str,
+        rewrite: str = "",
+        methods: Optional[Iterable[str]] = None,
+        root_methods: Optional[Iterable[str]] = None,
+    ):
+        self.prefix = "/" + prefix.strip("/")
+        self.upstream = upstream
+        self.rewrite = rewrite.strip("/")
+        self.methods: FrozenSet[str] = frozenset(m.upper() for m in methods) if methods else ALL_METHODS
+        self.root_methods: FrozenSet[str] = frozenset(m.upper() for m in root_methods) if root_methods else self.methods
+
+    def allows(self, method: str, path: str) -> bool:
+        """Whether method may be forwarded for path (the prefix itself or a path under it)."""
+        if path.rstrip("/") == self.prefix:
+            return method in self.root_methods
+        return method in self.methods
+
+    def upstream_path(self, remainder: str) -> str:
+        if not remainder:
+            return self.rewrite
+        if not self.rewrite:
+            return remainder
+        return f"{self.rewrite}/{remainder}"
+
+
+class RouteTable:
+    """
+    Prefix router over path segments.
+
+    Routes live in a dict-of-dicts trie keyed by segment, so a lookup walks at
+    most one node per path segment no matter how many routes are configured.
+    The longest matching prefix wins.
+    """
+
+    def __init__(self, routes: Iterable[Dict[str, Any]]):
+        self._root: Dict[str, Any] = {}
+        self.routes: List[Route] = []
+        for spec in routes:
+            self.add(Route(spec["prefix"], spec["upstream"], spec.get("rewrite", ""), spec.get("methods"), spec.get("rootMethods")))
+
+    def add(self, route: Route) -> None:
+        node = self._root
+        for segment in route.prefix.strip("/").split("/"):
+            node = node.setdefault(segment, {})
+        self.routes = [r for r in self.routes if r.prefix != route.prefix] + [route]
+        node[None] = route
+
+    def match(self, path: str) -> Optional[Tuple[Route, str]]:
+        """Return (route, upstream path) for the longest matching prefix, or None."""
+        segments = path_segments(path)
+        if not segments:
+            return None
+        node = self._root
+        best: Optional[Route] = None
+        depth = 0
+        for i, segment in enumerate(segments):
+            node = node.get(segment)
+            if node is None:
+                break
+            route = node.get(None)
+            if route is not None:
+                best, depth = route, i + 1
+        if best is None:
+            return None
+        return best, best.upstream_path("/".join(segments[depth:]))
+
+
+def load_config(path: Optional[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Read extra upstreams and routes from a JSON file:
+    {"upstreams": {"name": "http://host:port"}, "routes": [{"prefix": ..., "upstream": ..., "rewrite": ..., "methods": [...], "rootMethods": [...]}]}
+    An upstream may also be a list (or comma-separated string) of replica URLs.
+    Routes with an existing prefix replace the default entry.
+    """
+    if not path:
+        return {}, []
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return dict(data.get("upstreams") or {}), list(data.get("routes") or [])
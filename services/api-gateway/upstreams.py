@@ -0,0 +1,295 @@
+import hashlib
+import os
+import random
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (only needed when HTTP/2 is switched on)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _NoStoreCookiePolicy(DefaultCookiePolicy):
+    """The pooled client is shared by all users, so it must never keep upstream Set-Cookie values."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+def env_setting(name: str, key: str, default: str) -> str:
+    """Per-upstream setting (e.g. SESSIONS_TIMEOUT), falling back to GATEWAY_<KEY>."""
+    return os.getenv(f"{name.upper()}_{key}", os.getenv(f"GATEWAY_{key}", default))
+
+
+LEAST_OUTSTANDING = "least"
+POWER_OF_TWO = "p2c"
+# response extension holding the replica a streamed response is still counted against
+REPLICA_EXTENSION = "gateway.replica"
+# errors that mean the connection was never made: the replica is down (or unreachable) and
+# the request never reached it, so it is marked failed and may be retried elsewhere
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class Replica:
+    """One instance of an upstream service: in-flight count and health as seen by the gateway."""
+
+    __slots__ = ("url", "outstanding", "requests", "errors", "healthy", "failures", "successes")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.healthy = True
+        self.failures = 0
+        self.successes = 0
+
+    def mark(self, ok: bool, unhealthy_after: int, healthy_after: int) -> None:
+        """Feed a probe or connection outcome; consecutive failures take the replica out of rotation."""
+        if ok:
+            self.failures = 0
+            self.successes += 1
+            if not self.healthy and self.successes >= healthy_after:
+                self.healthy = True
+                print(f"[gateway] replica {self.url} back in rotation")
+        else:
+            self.successes = 0
+            self.failures += 1
+            if self.healthy and self.failures >= unhealthy_after:
+                self.healthy = False
+                print(f"[gateway] replica {self.url} taken out of rotation")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+def _rendezvous(key: str, replica: Replica) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{key}|{replica.url}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class UpstreamPool:
+    """
+    Long-lived httpx client for one upstream service and its replicas.
+
+    Keeps a keep-alive connection pool open for the lifetime of the gateway and
+    counts how many requests reused a pooled connection (hits) versus had to
+    open a new TCP connection (misses). Setting transport before start()
+    (e.g. httpx.ASGITransport in monolith mode) dispatches in-process instead.
+
+    With several replicas (comma-separated base URLs) each request goes to the
+    healthy replica with the fewest outstanding requests, or the better of two
+    random picks ("p2c"); with sticky routing a key such as the user id is
+    mapped to a replica by rendezvous hashing, so only that replica's users
+    move when one drops out of rotation.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: Union[str, Sequence[str]],
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        balance: str = LEAST_OUTSTANDING,
+        sticky: bool = False,
+        unhealthy_after: int = 2,
+        healthy_after: int = 1,
+    ):
+        self.name = name
+        urls = base_url.split(",") if isinstance(base_url, str) else list(base_url)
+        self.replicas: List[Replica] = [Replica(u.strip()) for u in urls if u.strip()]
+        if not self.replicas:
+            raise ValueError(f"upstream {name} has no base URL")
+        self.base_url = self.replicas[0].url
+        self.balance = balance if balance in (LEAST_OUTSTANDING, POWER_OF_TWO) else LEAST_OUTSTANDING
+        self.sticky = sticky
+        self.unhealthy_after = unhealthy_after
+        self.healthy_after = healthy_after
+        self._turn = 0
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        if http2 and not HTTP2_AVAILABLE:
+            print(f"[gateway] HTTP/2 requested for {name} but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.client: Optional[httpx.AsyncClient] = None
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls, name: str, base_url: Union[str, Sequence[str]]) -> "UpstreamPool":
+        return cls(
+            name,
+            base_url,
+            max_connections=int(env_setting(name, "MAX_CONNECTIONS", "100")),
+            max_keepalive=int(env_setting(name, "MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(env_setting(name, "KEEPALIVE_EXPIRY", "30")),
+            http2=env_setting(name, "HTTP2", "0").lower() in {"1", "true", "yes"},
+            timeout=float(env_setting(name, "TIMEOUT", "10")),
+            connect_timeout=float(env_setting(name, "CONNECT_TIMEOUT", "3")),
+            balance=env_setting(name, "BALANCE", LEAST_OUTSTANDING).lower(),
+            sticky=env_setting(name, "STICKY", "0").lower() in {"1", "true", "yes"},
+            unhealthy_after=int(env_setting(name, "UNHEALTHY_AFTER", "2")),
+            healthy_after=int(env_setting(name, "HEALTHY_AFTER", "1")),
+        )
+
+    def start(self) -> None:
+        if self.client is not None:
+            return
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            http2=self.http2,
+            follow_redirects=True,
+            cookies=CookieJar(policy=_NoStoreCookiePolicy()),
+            transport=self.transport,
+        )
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def url(self, path: str, replica: Optional[Replica] = None) -> str:
+        base = (replica or self.replicas[0]).url
+        if not path:
+            return base
+        return f"{base}/{path.lstrip('/')}"
+
+    def pick(self, key: Optional[str] = None, exclude: Iterable[Replica] = ()) -> Replica:
+        """Choose the replica for one request; unhealthy replicas are only used when nothing else is left."""
+        if len(self.replicas) == 1:
+            return self.replicas[0]
+        candidates = [r for r in self.replicas if r.healthy and r not in exclude]
+        if not candidates:
+            candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.sticky and key:
+            return max(candidates, key=lambda r: _rendezvous(key, r))
+        if self.balance == POWER_OF_TWO:
+            a, b = random.sample(candidates, 2)
+            return a if a.outstanding <= b.outstanding else b
+        # rotate the starting point so equally loaded replicas take turns
+        self._turn += 1
+        count = len(candidates)
+        best = candidates[self._turn % count]
+        for i in range(1, count):
+            replica = candidates[(self._turn + i) % count]
+            if replica.outstanding < best.outstanding:
+                best = replica
+        return best
+
+    def mark(self, replica: Replica, ok: bool) -> None:
+        replica.mark(ok, self.unhealthy_after, self.healthy_after)
+
+    async def send(self, method: str, path: str, stream: bool = False, key: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request to one replica and record whether a pooled connection was reused.
+
+        key selects the replica when sticky routing is on. A refused or timed-out
+        connect (CONNECT_ERRORS) counts against the replica's health and is retried
+        on another replica unless the body is a one-shot stream; other errors
+        (read timeouts, protocol errors) are left to the caller and the breaker.
+
+        With stream=True the response body is left unread; the caller must iterate it,
+        call aclose() so the connection goes back to the pool, and then release().
+        """
+        self.start()
+        replayable = not stream or not hasattr(kwargs.get("content"), "__aiter__")
+        tried: List[Replica] = []
+        replica = self.pick(key)
+        while True:
+            opened = False
+
+            async def trace(event_name: str, info: Dict[str, Any]) -> None:
+                nonlocal opened
+                if event_name.startswith("connection.connect_tcp.started"):
+                    opened = True
+
+            self.requests += 1
+            replica.requests += 1
+            replica.outstanding += 1
+            upstream_req = self.client.build_request(
+                method, self.url(path, replica), extensions={"trace": trace}, **kwargs
+            )
+            try:
+                resp = await self.client.send(upstream_req, stream=stream)
+            except httpx.RequestError as exc:
+                replica.outstanding -= 1
+                self.errors += 1
+                replica.errors += 1
+                if not isinstance(exc, CONNECT_ERRORS):
+                    # the replica answered the connect, only slowly or badly: the breaker judges that
+                    raise
+                self.mark(replica, False)
+                tried.append(replica)
+                # a refused connection never reached the service, so another replica may take it
+                if replayable and len(tried) < len(self.replicas):
+                    replica = self.pick(key, exclude=tried)
+                    continue
+                raise
+            except BaseException:
+                replica.outstanding -= 1
+                raise
+            finally:
+                if opened:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if stream:
+                resp.extensions[REPLICA_EXTENSION] = replica
+            else:
+                replica.outstanding -= 1
+            if not replica.healthy:
+                self.mark(replica, True)
+            return resp
+
+    def release(self, resp: httpx.Response) -> None:
+        """Stop counting a streamed response against its replica once its body has been relayed."""
+        replica = resp.extensions.pop(REPLICA_EXTENSION, None)
+        if replica is not None:
+            replica.outstanding -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "upstream": self.name,
+            "baseUrl": self.base_url,
+            "balance": self.balance,
+            "sticky": self.sticky,
+            "replicas": [r.stats() for r in self.replicas],
+            "inProcess": self.transport is not None,
+            "requests": self.requests,
+            "poolHits": self.hits,
+            "poolMisses": self.misses,
+            "errors": self.errors,
+            "maxConnections": self.max_connections,
+            "maxKeepalive": self.max_keepalive,
+            "keepaliveExpiry": self.keepalive_expiry,
+            "http2": self.http2,
+            "timeout": self.timeout,
+        }
@@ -1,5 +1,7 @@
 import os
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, Optional
 
 import jwt
@@ -7,6 +9,13 @@ from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.identity import identity_claims
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
+
 
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
 JWT_EXPIRY_HOURS = int(os.getenv("JWT_EXPIRY_HOURS", "24"))
@@ -44,6 +53,9 @@ USERS: Dict[str, Dict[str, Optional[str]]] = {
     }
 }
 
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("auth", USERS=USERS)
+
 
 class LoginRequest(BaseModel):
     email: str
@@ -70,18 +82,8 @@ def create_token(user: Dict[str, Optional[str]]) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
 
 
-def decode_token(token: str) -> Dict:
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
-
-
 def get_current_user(request: Request) -> Dict[str, Optional[str]]:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    payload = decode_token(token)
+    payload = identity_claims(request)
     user_id = payload.get("sub")
     role = payload.get("role")
     for user in USERS.values():
@@ -105,6 +107,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "auth")
+TRACER = install_tracing(app, "auth")
+
 
 @app.get("/health")
 async def health():
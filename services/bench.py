@@ -0,0 +1,188 @@
+"""
+In-process benchmark of the sessions store at synthetic-dataset scale.
+
+    python services/bench.py --sessions 100000 --tutors 5000
+    python services/bench.py --sessions 100000 --out sessions-bench.json
+
+Generates the sessions tables with datagen.py (no bookings or messages), loads
+them into the sessions service imported in this process, and times:
+- table lookups: a full scan against the secondary indexes (per tutor,
+  status and course) and the cost the indexes add to inserts and deletes;
+- slot lookups: one tutor's slot scanned out of a list against the per-tutor
+  map and the global slot -> tutor index;
+- endpoints: the sessions app called through httpx.ASGITransport with a
+  gateway identity header, so no network or gateway is involved; /browse
+  as the pre-serialized listing, a 304 revalidation and filtered cursor
+  pages, ?since= deltas covering 100 writes (/browse and /tutor/sessions),
+  plus the cost of rebuilding the listing from scratch and after 100 writes.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+SERVICES_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SERVICES_DIR))
+import datagen
+from common import snapshot
+from common.identity import IDENTITY_HEADER, sign_identity
+from common.indexed import IndexedTable
+from common.snapshot import write_snapshot
+from monolith import load_service
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Per-call timings in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {"p50Us": round(statistics.median(samples), 1), "maxUs": round(max(samples), 1), "calls": repeat}
+
+
+async def measure_async(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {"p50Us": round(statistics.median(samples), 1), "maxUs": round(max(samples), 1), "calls": repeat}
+
+
+def report(results: Dict[str, Dict[str, Any]], name: str, timing: Dict[str, Any], **extra: Any) -> None:
+    results[name] = {**timing, **extra}
+    detail = " ".join(f"{k}={v}" for k, v in extra.items())
+    print(f"[bench] {name:<40} p50 {timing['p50Us']:>10.1f} us  max {timing['maxUs']:>10.1f} us  {detail}")
+
+
+def bench_tables(sessions: IndexedTable, repeat: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    tutor_id = next(iter(sessions.values()))["tutorId"]
+    course = next(iter(sessions.values()))["courseCode"]
+    rows = list(sessions.values())
+    for field, value in (("tutorId", tutor_id), ("courseCode", course), ("status", "active")):
+        hits = sessions.count(field, value)
+        report(results, f"scan {field}", measure(lambda: [r for r in rows if r.get(field) == value], max(1, repeat // 20)), rows=hits)
+        report(results, f"index {field}", measure(lambda: sessions.where(field, value), repeat if hits < 1000 else max(1, repeat // 20)), rows=hits)
+
+    plain: Dict[str, Dict[str, Any]] = {}
+    extra = {f"bench-{n}": {**rows[n % len(rows)], "id": f"bench-{n}"} for n in range(repeat)}
+    items = iter(extra.items())
+    report(results, "insert (dict)", measure(lambda: plain.__setitem__(*next(items)), repeat))
+    items = iter(extra.items())
+    report(results, "insert (indexed)", measure(lambda: sessions.__setitem__(*next(items)), repeat))
+    keys = iter(extra)
+    report(results, "status update (indexed)", measure(lambda: sessions.modify(next(keys), status="past"), repeat))
+    keys = iter(extra)
+    report(results, "delete (indexed)", measure(lambda: sessions.__delitem__(next(keys)), repeat))
+    return results
+
+
+def bench_slots(module: Any, repeat: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    # the tutor with the most slots, and their last one: the worst case for a list scan
+    tutor_id = max(module.AVAILABILITY, key=lambda t: len(module.AVAILABILITY[t]["slots"]))
+    slots = list(module.AVAILABILITY[tutor_id]["slots"].values())
+    slot_id = slots[-1]["id"]
+    report(results, "slot scan (list)", measure(lambda: next(s for s in slots if s["id"] == slot_id), repeat), slots=len(slots))
+    report(results, "slot lookup (tutor map)", measure(lambda: module.AVAILABILITY[tutor_id]["slots"].get(slot_id), repeat), slots=len(slots))
+    report(results, "slot lookup (global index)", measure(lambda: module.find_slot(slot_id), repeat), slots=len(module.SLOT_OWNERS))
+    return results
+
+
+async def bench_endpoints(module: Any, tutor_id: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    slot_id = next(iter(module.AVAILABILITY[tutor_id]["slots"]))
+    course = next(iter(module.SESSIONS.values()))["courseCode"]
+    # a cursor halfway down the listing
+    middle = module.encode_cursor(module.BROWSE_INDEX.entries[len(module.BROWSE_INDEX) // 2])
+    tutor = {IDENTITY_HEADER: sign_identity({"sub": tutor_id, "role": "TUTOR", "name": "Bench Tutor"}, ttl=3600)}
+    student = {IDENTITY_HEADER: sign_identity({"sub": "stu-000001", "role": "STUDENT", "name": "Bench Student"}, ttl=3600)}
+    transport = httpx.ASGITransport(app=module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://sessions") as client:
+        cases = [
+            ("GET /tutor/sessions", "/tutor/sessions", tutor, repeat),
+            ("GET /browse (snapshot)", "/browse", student, max(2, repeat // 10)),
+            ("GET /browse?limit=50", "/browse?limit=50", student, repeat),
+            ("GET /browse?limit=50&cursor=(middle)", f"/browse?limit=50&cursor={middle}", student, repeat),
+            ("GET /browse?courseCode&limit=50", f"/browse?courseCode={course}&limit=50", student, repeat),
+            ("GET /browse?day&mode&hasCapacity&limit=50", "/browse?day=monday&mode=online&hasCapacity=true&limit=50", student, repeat),
+            ("PUT /internal/slots/{id}/book", f"/internal/slots/{slot_id}/book", {}, repeat),
+        ]
+        # 100 writes since the version a polling client holds, a tenth of them to the tutor's sessions
+        version = module.SESSION_CHANGES.version
+        others = [key for key in module.BROWSE_INDEX.walk(module.BROWSE_INDEX.select()) if module.SESSIONS[key]["tutorId"] != tutor_id]
+        for key in [s["id"] for s in module.SESSIONS.where("tutorId", tutor_id)][:10] + others[:90]:
+            module.SESSIONS.modify(key)
+        cases.insert(1, ("GET /tutor/sessions?since (100 changes)", f"/tutor/sessions?since={version}", tutor, repeat))
+        resp = await client.get("/browse", headers=student)
+        cases.insert(3, ("GET /browse If-None-Match (304)", "/browse", {**student, "If-None-Match": resp.headers["etag"]}, repeat))
+        cases.insert(4, ("GET /browse?since (100 changes)", f"/browse?since={version}", student, repeat))
+        for name, path, headers, calls in cases:
+            method = "PUT" if name.startswith("PUT") else "GET"
+            resp = await client.request(method, path, headers=headers)
+            if resp.status_code >= 400:
+                resp.raise_for_status()
+            # keep the per-request log lines out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                timing = await measure_async(lambda: client.request(method, path, headers=headers), calls)
+            report(results, name, timing, bytes=len(resp.content), status=resp.status_code)
+
+    snapshot_keys = list(module.BROWSE_INDEX.walk(module.BROWSE_INDEX.select()))
+
+    async def rebuild(dropped: int) -> None:
+        # what a write does to the snapshot, without changing the rows
+        for key in snapshot_keys[:dropped]:
+            module.BROWSE_SNAPSHOT.touch(key, None, module.SESSIONS[key])
+        await module.BROWSE_SNAPSHOT.rebuild()
+
+    calls = max(2, repeat // 500)
+    report(results, "browse snapshot rebuild (cold)", await measure_async(lambda: rebuild(len(snapshot_keys)), calls), sessions=len(snapshot_keys))
+    report(results, "browse snapshot rebuild (100 changed)", await measure_async(lambda: rebuild(100), calls), sessions=len(snapshot_keys))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the sessions store and endpoints on a generated dataset.")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--tutors", type=int, default=5000)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--repeat", type=int, default=1000, help="calls per cheap case; full scans and full listings run fewer")
+    parser.add_argument("--out", help="write the results as JSON")
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    dataset = datagen.generate(datagen.parse_args([
+        "--sessions", str(args.sessions), "--tutors", str(args.tutors), "--students", "1",
+        "--bookings", "0", "--messages", "0", "--seed", args.seed,
+    ]))
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        # load through the service's own startup path, as SNAPSHOT_DIR would
+        write_snapshot(Path(snapshot_dir) / "sessions.snap", "sessions", dataset["sessions"], {"bench": True})
+        snapshot.SNAPSHOT_DIR = snapshot_dir
+        module = load_service("sessions", "sessions")
+    print(f"[bench] {len(module.SESSIONS)} sessions loaded in {time.perf_counter() - started:.1f}s")
+    tutor_id = next(iter(dataset["sessions"]["SESSIONS"].values()))["tutorId"]
+
+    results = {"tables": bench_tables(module.SESSIONS, args.repeat)}
+    results["slots"] = bench_slots(module, args.repeat)
+    results["endpoints"] = await bench_endpoints(module, tutor_id, args.repeat)
+    if args.out:
+        Path(args.out).write_text(json.dumps({"sessions": len(module.SESSIONS), "results": results}, indent=2))
+        print(f"[bench] -> {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,79 @@
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from common.indexed import IndexedTable, Row
+
+
+class Change(NamedTuple):
+    key: str
+    # the row as it stands now, or as it was when deleted
+    row: Row
+    deleted: bool
+
+
+class ChangeLog:
+    """
+    Bounded log of an IndexedTable's inserts, updates and deletes, for ?since= delta sync.
+
+    Every write gets the next version. Versions start from the wall clock in
+    microseconds, so a version handed out by an earlier process or another
+    replica never falls inside this log's window and reads as "resync"
+    rather than as a wrong delta. Only the latest size writes are kept;
+    since() returns None for a version older than that.
+    """
+
+    def __init__(self, table: IndexedTable, size: int):
+        self.size = size
+        self.version = int(time.time() * 1_000_000)
+        # (version, key, row, deleted), versions consecutive
+        self._entries: List[Tuple[int, str, Row, bool]] = []
+        table.watchers.append(self.record)
+
+    def record(self, key: str, old: Optional[Row], row: Optional[Row]) -> None:
+        """Watcher: log the write under the next version."""
+        self.version += 1
+        self._entries.append((self.version, key, row if row is not None else old, row is None))
+        # trim in batches so appends stay amortized O(1)
+        if len(self._entries) > self.size + self.size // 4:
+            del self._entries[:-self.size]
+
+    def oldest(self) -> int:
+        """Smallest version since() still answers."""
+        return self._entries[0][0] - 1 if self._entries else self.version
+
+    def since(self, version: int) -> Optional[List[Change]]:
+        """Last change of each key written after version, in write order; None when the log cannot tell."""
+        if version > self.version or version < self.oldest():
+            return None
+        start = len(self._entries) - (self.version - version)
+        latest: Dict[str, Change] = {}
+        for _, key, row, deleted in self._entries[start:]:
+            latest.pop(key, None)
+            latest[key] = Change(key, row, deleted)
+        return list(latest.values())
+
+    def delta(
+        self,
+        version: int,
+        name: str,
+        view: Callable[[Row], Any],
+        keep: Callable[[Row], bool] = lambda row: True,
+        scope: Callable[[Row], bool] = lambda row: True,
+    ) -> Dict[str, Any]:
+        """
+        Body of a ?since=version reply. Changed rows within scope() that the
+        listing still holds (keep()) come back through view() under name; the
+        keys of the others are in "removed". "resync" asks the client to
+        fetch the full listing again because the log no longer covers version.
+        """
+        changes = self.since(version)
+        changed: List[Any] = []
+        removed: List[str] = []
+        for change in changes or ():
+            if not scope(change.row):
+                continue
+            if not change.deleted and keep(change.row):
+                changed.append(view(change.row))
+            else:
+                removed.append(change.key)
+        return {"ok": True, name: changed, "removed": removed, "version": self.version, "resync": changes is None}
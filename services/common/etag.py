@@ -0,0 +1,26 @@
+import hashlib
+from typing import Optional
+
+# Response headers a 304 repeats from the 200 it stands for
+NOT_MODIFIED_HEADERS = frozenset({"etag", "cache-control", "vary", "expires", "content-location", "date"})
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the response bytes, so equal bodies get equal tags on every replica."""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
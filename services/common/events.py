@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Set
+
+from starlette.responses import StreamingResponse
+
+EVENTS_QUEUE = int(os.getenv("EVENTS_QUEUE", "100"))
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", "15"))
+
+# audience role that matches every subscriber
+EVERYONE = "*"
+
+Event = Dict[str, Any]
+Match = Callable[[Event], bool]
+
+
+class Subscriber:
+    """One push connection: a bounded queue the hub writes into without waiting."""
+
+    def __init__(self, match: Optional[Match], max_queue: int):
+        self.match = match
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(max_queue)
+        self.overflows = 0
+
+    def offer(self, event: Event) -> bool:
+        if self.match is not None and not self.match(event):
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow consumer: drop its backlog and tell it to refetch instead of
+            # holding up the publisher or growing without bound
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflows += 1
+            self.queue.put_nowait({"id": event.get("id"), "type": "resync", "users": [], "roles": [EVERYONE], "data": {}})
+        return True
+
+
+class EventHub:
+    """
+    In-process pub/sub fan-out.
+
+    publish() never blocks: each subscriber has its own bounded queue, and a
+    subscriber that falls behind gets a single "resync" event in place of its
+    backlog.
+    """
+
+    def __init__(self, max_queue: int = EVENTS_QUEUE):
+        self.max_queue = max_queue
+        self._subscribers: Set[Subscriber] = set()
+        self.seq = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def publish(self, event_type: str, data: Dict[str, Any], users: Iterable[Optional[str]] = (), roles: Iterable[str] = ()) -> Event:
+        """Publish to subscribers whose user id is in users or whose role is in roles."""
+        event = {"type": event_type, "users": [u for u in users if u], "roles": list(roles), "data": data}
+        self.publish_event(event)
+        return event
+
+    def publish_event(self, event: Event) -> None:
+        self.seq += 1
+        event.setdefault("id", self.seq)
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            overflows = subscriber.overflows
+            if subscriber.offer(event):
+                self.delivered += 1
+                self.overflows += subscriber.overflows - overflows
+
+    @contextmanager
+    def subscribe(self, match: Optional[Match] = None) -> Iterator[Subscriber]:
+        subscriber = Subscriber(match, self.max_queue)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "queued": sum(s.queue.qsize() for s in self._subscribers),
+            "overflows": self.overflows,
+        }
+
+
+def for_user(payload: Dict[str, Any]) -> Match:
+    """Match events addressed to this JWT payload's user id or role."""
+    user_id = payload.get("sub")
+    role = payload.get("role")
+
+    def match(event: Event) -> bool:
+        roles = event.get("roles") or ()
+        return user_id in (event.get("users") or ()) or role in roles or EVERYONE in roles
+
+    return match
+
+
+def format_sse(event: Event, full: bool = False) -> str:
+    """SSE frame; full=True sends the whole event (audience included) for service-to-gateway streams."""
+    data = json.dumps(event if full else event.get("data", {}), separators=(",", ":"))
+    return f"id: {event.get('id')}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def sse_events(hub: EventHub, match: Optional[Match] = None, full: bool = False, keepalive: float = EVENTS_KEEPALIVE) -> AsyncIterator[str]:
+    with hub.subscribe(match) as subscriber:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # comment line keeps proxies from closing an idle stream
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event, full)
+
+
+def sse_response(hub: EventHub, match: Optional[Match] = None, full: bool = False) -> StreamingResponse:
+    return StreamingResponse(
+        sse_events(hub, match, full),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def read_sse(lines: AsyncIterator[str]) -> AsyncIterator[Event]:
+    """Parse full-event frames (as written by format_sse(full=True)) from an SSE line stream."""
+    data = []
+    async for line in lines:
+        if not line:
+            if data:
+                yield json.loads("\n".join(data))
+                data = []
+            continue
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
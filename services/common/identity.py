@@ -0,0 +1,109 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+from fastapi import HTTPException, Request
+
+JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
+ALGORITHM = "HS256"
+COOKIE_NAME = "access_token"
+
+# Gateway -> service identity: "<expires>.<base64url claims JSON>.<base64url truncated HMAC-SHA256>"
+IDENTITY_HEADER = "x-identity"
+IDENTITY_SECRET = (os.getenv("IDENTITY_SECRET") or f"identity:{JWT_SECRET}").encode("utf-8")
+IDENTITY_TTL = int(os.getenv("IDENTITY_TTL", "30"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
+# A user's polls reuse one signed value for half its lifetime, so services see the
+# same string repeatedly and answer from _verified without recomputing the MAC
+_signed: Dict[Tuple[Any, ...], Tuple[float, str]] = {}
+_verified: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _mac(message: bytes) -> bytes:
+    return hmac.new(IDENTITY_SECRET, message, hashlib.sha256).digest()[:16]
+
+
+def _remember(cache: Dict, key: Any, value: Any) -> None:
+    if len(cache) >= IDENTITY_CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+
+
+def sign_identity(claims: Dict[str, Any], ttl: int = IDENTITY_TTL) -> str:
+    """Header value carrying claims the gateway already verified; valid for ttl seconds, never past the JWT exp."""
+    now = time.time()
+    try:
+        key = tuple(claims.items())
+        signed = _signed.get(key)
+    except TypeError:
+        # unhashable claim values: sign every time
+        return _sign(claims, int(now) + ttl)
+    if signed is not None and signed[0] > now:
+        return signed[1]
+    value = _sign(claims, int(now) + ttl)
+    _remember(_signed, key, (now + ttl / 2, value))
+    return value
+
+
+def _sign(claims: Dict[str, Any], expires: int) -> str:
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        expires = min(expires, int(exp))
+    body = f"{expires}.{_b64(json.dumps(claims, separators=(',', ':')).encode('utf-8'))}"
+    return f"{body}.{_b64(_mac(body.encode('ascii')))}"
+
+
+def verify_identity(value: str) -> Optional[Dict[str, Any]]:
+    """Claims from a sign_identity value, or None when the MAC does not match or it has expired."""
+    now = time.time()
+    known = _verified.get(value)
+    if known is not None:
+        return known[1] if known[0] > now else None
+    body, _, mac = value.rpartition(".")
+    expires, _, claims = body.partition(".")
+    try:
+        if not hmac.compare_digest(_unb64(mac), _mac(body.encode("ascii"))):
+            return None
+        if int(expires) <= now:
+            return None
+        payload = json.loads(_unb64(claims))
+    except (ValueError, UnicodeEncodeError):
+        return None
+    _remember(_verified, value, (int(expires), payload))
+    return payload
+
+
+def identity_claims(request: Request) -> Dict[str, Any]:
+    """
+    FastAPI dependency returning the caller's JWT claims.
+
+    Requests through the gateway carry its signed identity header, checked
+    with one short HMAC (or a dict lookup for a value already seen); anything else (direct calls, internal clients, an
+    expired header) falls back to decoding the access_token cookie.
+    """
+    header = request.headers.get(IDENTITY_HEADER)
+    if header:
+        claims = verify_identity(header)
+        if claims is not None:
+            return claims
+    token = request.cookies.get(COOKIE_NAME)
+    if not token:
+        raise HTTPException(status_code=401, detail="unauthorized")
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError as exc:
+        raise HTTPException(status_code=401, detail="unauthorized") from exc
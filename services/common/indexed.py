@@ -0,0 +1,219 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Row = Dict[str, Any]
+# Called after every write with (key, row before or None, row after or None)
+Watcher = Callable[[str, Optional[Row], Optional[Row]], None]
+# (sort key, row key): row keys break ties, so every entry is unique
+Entry = Tuple[Any, str]
+
+
+class IndexedTable(dict):
+    """
+    In-memory table (id -> row dict) with secondary indexes on chosen fields.
+
+    Each index maps a field value to the rows holding it, so where() costs
+    time proportional to its result instead of a scan over the whole table.
+    Inserts, replacements and deletes through the dict interface keep the
+    indexes in step; an indexed field changed on a stored row must go
+    through modify(), since the table cannot see in-place edits. Derived
+    structures such as a SortedIndex follow the table through its watchers.
+    positions numbers keys in insertion order (kept when a row is replaced,
+    as dict order is), for sort orders that break ties the way a stable
+    sort over values() would.
+    """
+
+    def __init__(self, fields: Iterable[str], rows: Optional[Dict[str, Row]] = None):
+        super().__init__()
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.indexes: Dict[str, Dict[Any, Dict[str, Row]]] = {field: {} for field in self.fields}
+        self.watchers: List[Watcher] = []
+        self.positions: Dict[str, int] = {}
+        self._next_position = 0
+        if rows:
+            self.update(rows)
+
+    def _index(self, key: str, row: Row) -> None:
+        for field in self.fields:
+            self.indexes[field].setdefault(row.get(field), {})[key] = row
+
+    def _unindex(self, key: str, row: Row) -> None:
+        for field in self.fields:
+            self._drop(field, row.get(field), key)
+
+    def _drop(self, field: str, value: Any, key: str) -> None:
+        index = self.indexes[field]
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del index[value]
+
+    def _notify(self, key: str, old: Optional[Row], row: Optional[Row]) -> None:
+        for watcher in self.watchers:
+            watcher(key, old, row)
+
+    def __setitem__(self, key: str, row: Row) -> None:
+        old = self.get(key)
+        if old is not None:
+            self._unindex(key, old)
+        else:
+            self.positions[key] = self._next_position
+            self._next_position += 1
+        super().__setitem__(key, row)
+        self._index(key, row)
+        self._notify(key, old, row)
+
+    def __delitem__(self, key: str) -> None:
+        row = self[key]
+        super().__delitem__(key)
+        del self.positions[key]
+        self._unindex(key, row)
+        self._notify(key, row, None)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self:
+            return super().pop(key, *default)
+        row = super().pop(key)
+        del self.positions[key]
+        self._unindex(key, row)
+        self._notify(key, row, None)
+        return row
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, row in dict(*args, **kwargs).items():
+            self[key] = row
+
+    def setdefault(self, key: str, default: Row) -> Row:
+        if key not in self:
+            if default is None:
+                # rows are dicts; indexes and watchers read fields from them
+                raise TypeError("IndexedTable.setdefault needs a row to insert")
+            self[key] = default
+        return self[key]
+
+    def clear(self) -> None:
+        for key in list(self):
+            del self[key]
+
+    def modify(self, key: str, **changes: Any) -> Row:
+        """
+        Apply field changes to a stored row, moving it between index buckets as
+        needed, and tell the watchers. Call it without changes after editing a
+        nested value (e.g. a session's slots) in place.
+        """
+        row = self[key]
+        old = dict(row) if self.watchers else None
+        for field, value in changes.items():
+            if field in self.indexes and row.get(field) != value:
+                self._drop(field, row.get(field), key)
+                self.indexes[field].setdefault(value, {})[key] = row
+        row.update(changes)
+        self._notify(key, old, row)
+        return row
+
+    def where(self, field: str, value: Any) -> List[Row]:
+        """Rows whose field equals value, in insertion order."""
+        return list(self.indexes[field].get(value, {}).values())
+
+    def count(self, field: str, value: Any) -> int:
+        return len(self.indexes[field].get(value, ()))
+
+
+class SortedIndex:
+    """
+    The keys of an IndexedTable's rows in one sort order, for cursor pagination.
+
+    Rows that pass include() are kept as (sort key, row key) entries in a
+    sorted list, and again in one sorted list per value of each facet, so a
+    filtered page starts with a binary search for the cursor and then reads
+    entries in order. The index follows the table through its watchers;
+    build it after bulk loads, which it sorts once instead of entry by entry.
+    """
+
+    def __init__(
+        self,
+        table: IndexedTable,
+        sort_key: Callable[[Row], Any],
+        facets: Optional[Dict[str, Callable[[Row], Any]]] = None,
+        include: Callable[[Row], bool] = lambda row: True,
+    ):
+        self.sort_key = sort_key
+        self.facets = dict(facets or {})
+        self.include = include
+        self.entries: List[Entry] = []
+        self.by: Dict[str, Dict[Any, List[Entry]]] = {name: {} for name in self.facets}
+        # row key -> its entry and facet values, to find it again after the row changed
+        self._stored: Dict[str, Tuple[Entry, Dict[str, Any]]] = {}
+        for key, row in table.items():
+            if include(row):
+                self._store(key, row)
+        self.entries.sort()
+        for lists in self.by.values():
+            for entries in lists.values():
+                entries.sort()
+        table.watchers.append(self.refresh)
+
+    def _store(self, key: str, row: Row) -> None:
+        entry = (self.sort_key(row), key)
+        values = {name: facet(row) for name, facet in self.facets.items()}
+        self._stored[key] = (entry, values)
+        self.entries.append(entry)
+        for name, value in values.items():
+            self.by[name].setdefault(value, []).append(entry)
+
+    def refresh(self, key: str, old: Optional[Row], row: Optional[Row]) -> None:
+        """Watcher: drop the row's old entries and file it again if it still qualifies."""
+        stored = self._stored.pop(key, None)
+        if stored is not None:
+            entry, values = stored
+            _discard(self.entries, entry)
+            for name, value in values.items():
+                entries = self.by[name][value]
+                _discard(entries, entry)
+                if not entries:
+                    del self.by[name][value]
+        if row is None or not self.include(row):
+            return
+        entry = (self.sort_key(row), key)
+        values = {name: facet(row) for name, facet in self.facets.items()}
+        self._stored[key] = (entry, values)
+        insort(self.entries, entry)
+        for name, value in values.items():
+            insort(self.by[name].setdefault(value, []), entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._stored
+
+    def select(self, name: Optional[str] = None, value: Any = None) -> List[Entry]:
+        """All entries, or those of one facet value; sorted, and not to be modified."""
+        if name is None:
+            return self.entries
+        return self.by[name].get(value, [])
+
+    def entry(self, key: str) -> Entry:
+        return self._stored[key][0]
+
+    def values(self, key: str) -> Dict[str, Any]:
+        """Facet values the row was filed under."""
+        return self._stored[key][1]
+
+    def walk(self, entries: List[Entry], after: Optional[Entry] = None, descending: bool = False) -> Iterator[str]:
+        """Row keys of entries in order, starting past the cursor entry."""
+        if descending:
+            start = bisect_left(entries, after) if after is not None else len(entries)
+            for i in range(start - 1, -1, -1):
+                yield entries[i][1]
+        else:
+            start = bisect_right(entries, after) if after is not None else 0
+            for i in range(start, len(entries)):
+                yield entries[i][1]
+
+
+def _discard(entries: List[Entry], entry: Entry) -> None:
+    i = bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
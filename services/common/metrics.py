@@ -0,0 +1,198 @@
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette.responses import Response
+
+# Latency buckets in seconds, shared by request and upstream-call histograms
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# scope key an app can set to override the route label (e.g. the gateway's route prefix)
+ROUTE_LABEL_KEY = "metrics.route"
+
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process request metrics for one service, rendered in Prometheus text format.
+
+    Everything is plain dict/list updates on the event loop thread, so the
+    per-request cost is a couple of dict lookups and a bisect.
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.in_flight = 0
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._upstream_calls: Dict[Tuple[str, str], int] = {}
+        self._upstream_latency: Dict[Tuple[str], Histogram] = {}
+        self._collectors: List[Collector] = []
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        key = (route, method, f"{status // 100}xx")
+        self._requests[key] = self._requests.get(key, 0) + 1
+        hist = self._latency.get((route, method))
+        if hist is None:
+            hist = self._latency[(route, method)] = Histogram()
+        hist.observe(seconds)
+
+    def observe_upstream(self, upstream: str, seconds: float, status: Optional[int]) -> None:
+        outcome = "error" if status is None else f"{status // 100}xx"
+        key = (upstream, outcome)
+        self._upstream_calls[key] = self._upstream_calls.get(key, 0) + 1
+        hist = self._upstream_latency.get((upstream,))
+        if hist is None:
+            hist = self._upstream_latency[(upstream,)] = Histogram()
+        hist.observe(seconds)
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callback yielding (name, type, help, [(labels, value)]) at scrape time."""
+        self._collectors.append(collector)
+
+    def httpx_hooks(self, upstream: str) -> Dict[str, list]:
+        """event_hooks for an httpx.AsyncClient that time outbound calls to one upstream."""
+
+        async def on_request(request) -> None:
+            request.extensions["metrics_start"] = time.perf_counter()
+
+        async def on_response(response) -> None:
+            started = response.request.extensions.get("metrics_start")
+            if started is not None:
+                self.observe_upstream(upstream, time.perf_counter() - started, response.status_code)
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def _histogram_lines(self, name: str, label_names: Tuple[str, ...], series: Dict[tuple, Histogram]) -> List[str]:
+        lines = []
+        for values, hist in series.items():
+            values = (self.service,) + tuple(values)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist.counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{name}_bucket{_labels(label_names, values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_labels(label_names, values, le)} {hist.count}")
+            lines.append(f"{name}_sum{_labels(label_names, values)} {hist.total}")
+            lines.append(f"{name}_count{_labels(label_names, values)} {hist.count}")
+        return lines
+
+    def render(self) -> str:
+        svc = ("service",)
+        lines = [
+            "# HELP http_requests_total Requests handled, by route, method and status class.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route, method, status), count in self._requests.items():
+            labels = _labels(svc + ("route", "method", "status"), (self.service, route, method, status))
+            lines.append(f"http_requests_total{labels} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route and method.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        lines += self._histogram_lines("http_request_duration_seconds", svc + ("route", "method"), self._latency)
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight{_labels(svc, (self.service,))} {self.in_flight}",
+        ]
+
+        if self._upstream_calls:
+            lines += [
+                "# HELP upstream_requests_total Outbound calls to other services, by outcome.",
+                "# TYPE upstream_requests_total counter",
+            ]
+            for (upstream, outcome), count in self._upstream_calls.items():
+                labels = _labels(svc + ("upstream", "outcome"), (self.service, upstream, outcome))
+                lines.append(f"upstream_requests_total{labels} {count}")
+            lines += [
+                "# HELP upstream_request_duration_seconds Outbound call latency, by upstream.",
+                "# TYPE upstream_request_duration_seconds histogram",
+            ]
+            lines += self._histogram_lines("upstream_request_duration_seconds", svc + ("upstream",), self._upstream_latency)
+
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = svc + tuple(labels)
+                    lines.append(f"{name}{_labels(names, (self.service,) + tuple(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware overhead) feeding a Metrics instance."""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            route = scope.get(ROUTE_LABEL_KEY)
+            if route is None:
+                matched = scope.get("route")
+                route = getattr(matched, "path", None) or "unmatched"
+            metrics.observe_request(route, scope["method"], status, time.perf_counter() - started)
+
+
+def install_metrics(app: FastAPI, service: str) -> Metrics:
+    """Mount the metrics middleware and a GET /metrics endpoint on a service app."""
+    metrics = Metrics(service)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+    return metrics
@@ -0,0 +1,80 @@
+import gc
+import json
+import os
+import pickle
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+
+# file layout: MAGIC | version u16 | header length u32 | JSON header | pickle payload
+MAGIC = b"CNPMSNAP"
+VERSION = 1
+_PREFIX = struct.Struct("<HI")
+
+
+def write_snapshot(path: Path, service: str, tables: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> int:
+    """Write one service's tables; returns the file size in bytes."""
+    header = {
+        "service": service,
+        "counts": {name: len(table) for name, table in tables.items()},
+        **(meta or {}),
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(_PREFIX.pack(VERSION, len(header_bytes)))
+        fh.write(header_bytes)
+        pickle.dump(tables, fh, protocol=5)
+    return path.stat().st_size
+
+
+def read_header(fh) -> Dict[str, Any]:
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{fh.name} is not a snapshot file")
+    version, header_len = _PREFIX.unpack(fh.read(_PREFIX.size))
+    if version != VERSION:
+        raise ValueError(f"{fh.name} has snapshot version {version}, expected {VERSION}")
+    return json.loads(fh.read(header_len))
+
+
+def read_snapshot(path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    with open(path, "rb") as fh:
+        header = read_header(fh)
+        # millions of small dicts: collection passes during the load only cost time
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            tables = pickle.load(fh)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    gc.freeze()
+    return header, tables
+
+
+def load_snapshot(service: str, **targets: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Merge <SNAPSHOT_DIR>/<service>.snap into the given in-memory tables.
+
+    Each keyword names a table in the snapshot and the dict to update with it,
+    e.g. load_snapshot("sessions", SESSIONS=SESSIONS). Hard-coded demo records
+    stay in place. Returns the snapshot header, or None when SNAPSHOT_DIR is
+    unset or the file is missing.
+    """
+    if not SNAPSHOT_DIR:
+        return None
+    path = Path(SNAPSHOT_DIR) / f"{service}.snap"
+    if not path.exists():
+        print(f"[snapshot] {path} not found, starting with seed data only")
+        return None
+    started = time.perf_counter()
+    header, tables = read_snapshot(path)
+    for name, target in targets.items():
+        target.update(tables.get(name, {}))
+    counts = ", ".join(f"{name}={len(tables.get(name, ()))}" for name in targets)
+    print(f"[snapshot] loaded {path} ({counts}) in {time.perf_counter() - started:.2f}s")
+    return header
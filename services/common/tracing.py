@@ -0,0 +1,207 @@
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import FastAPI, Query
+
+from common.metrics import ROUTE_LABEL_KEY
+
+TRACE_FILE = os.getenv("TRACE_FILE")
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", "5000"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# span of the request (or outbound call) currently running in this task
+CURRENT_SPAN: "ContextVar[Optional[Span]]" = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace id, parent span id, sampled) from a W3C traceparent header, or None."""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    __slots__ = ("tracer", "name", "kind", "trace_id", "span_id", "parent_id", "sampled", "attributes", "start", "_t0", "status", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = {}
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def end(self) -> None:
+        if self.sampled:
+            self.tracer.export(self, time.perf_counter() - self._t0)
+
+
+class Tracer:
+    """
+    Minimal W3C trace-context tracer for one service.
+
+    Finished spans go into a bounded in-memory buffer (served at GET /traces)
+    and, when TRACE_FILE is set, are appended to it as JSON lines so spans from
+    every service can be joined on traceId.
+    """
+
+    def __init__(self, service: str, buffer: int = TRACE_BUFFER, sample_rate: float = TRACE_SAMPLE_RATE, path: Optional[str] = TRACE_FILE):
+        self.service = service
+        self.sample_rate = sample_rate
+        self.spans: Deque[Dict[str, Any]] = deque(maxlen=buffer)
+        self._file = open(path, "a", buffering=1, encoding="utf-8") if path else None
+
+    def start_span(self, name: str, kind: str, parent: Optional[Tuple[str, str, bool]] = None) -> Span:
+        """Start a span under parent (trace id, span id, sampled), else under the current span, else a new trace."""
+        if parent is None:
+            current = CURRENT_SPAN.get()
+            if current is not None:
+                parent = (current.trace_id, current.span_id, current.sampled)
+        if parent is None:
+            return Span(self, name, kind, f"{random.getrandbits(128):032x}", None, random.random() < self.sample_rate)
+        trace_id, parent_id, sampled = parent
+        return Span(self, name, kind, trace_id, parent_id, sampled)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+        span = self.start_span(name, kind)
+        span.attributes.update(attributes)
+        token = CURRENT_SPAN.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = type(exc).__name__
+            raise
+        finally:
+            CURRENT_SPAN.reset(token)
+            span.end()
+
+    def export(self, span: Span, duration: float) -> None:
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentId": span.parent_id,
+            "service": self.service,
+            "name": span.name,
+            "kind": span.kind,
+            "start": span.start,
+            "durationMs": round(duration * 1000, 3),
+            "status": span.status,
+            "error": span.error,
+            "attributes": span.attributes,
+        }
+        self.spans.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+
+    def httpx_hooks(self, peer: str) -> Dict[str, list]:
+        """
+        event_hooks for an httpx.AsyncClient: one client span per call, with
+        traceparent injected. httpx runs no hook for a call that raises, so the
+        client's owner passes such errors to end_failed().
+        """
+
+        async def on_request(request) -> None:
+            span = self.start_span(f"{request.method} {peer}", "client")
+            span.attributes.update({"peer": peer, "http.url": str(request.url)})
+            request.headers[TRACEPARENT] = span.traceparent
+            request.extensions["trace_span"] = span
+
+        async def on_response(response) -> None:
+            span = response.request.extensions.pop("trace_span", None)
+            if span is not None:
+                span.status = response.status_code
+                span.end()
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def end_failed(self, exc: Exception) -> None:
+        """End the client span of an httpx call that raised (refused, timed out), marked with the error."""
+        try:
+            request = exc.request
+        except RuntimeError:
+            # raised before any request was built
+            return
+        span = request.extensions.pop("trace_span", None)
+        if span is not None:
+            span.error = type(exc).__name__
+            span.end()
+
+    def find(self, trace_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        spans = [s for s in self.spans if trace_id is None or s["traceId"] == trace_id]
+        return spans[-limit:]
+
+
+class TracingMiddleware:
+    """Opens a server span per HTTP request, continuing the caller's traceparent if present."""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        span = self.tracer.start_span(scope["method"], "server", incoming)
+        span.attributes["http.target"] = scope["path"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                span.status = message["status"]
+            await send(message)
+
+        token = CURRENT_SPAN.set(span)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            span.error = type(exc).__name__
+            raise
+        finally:
+            CURRENT_SPAN.reset(token)
+            route = scope.get(ROUTE_LABEL_KEY)
+            if route is None:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+            span.name = f"{scope['method']} {route}"
+            span.end()
+
+
+def install_tracing(app: FastAPI, service: str) -> Tracer:
+    """Mount the tracing middleware and a GET /traces endpoint listing recent spans."""
+    tracer = Tracer(service)
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.get("/traces", include_in_schema=False)
+    async def recent_traces(traceId: Optional[str] = None, limit: int = Query(100, ge=1, le=5000)):
+        return {"ok": True, "service": service, "spans": tracer.find(traceId, limit)}
+
+    return tracer
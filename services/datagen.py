@@ -0,0 +1,275 @@
+"""
+Deterministic synthetic dataset for load and scale testing.
+
+    python services/datagen.py --out snapshot --seed 42
+    python services/datagen.py --out snapshot --tutors 5000 --students 50000 \\
+        --sessions 100000 --bookings 1000000 --messages 10000000
+    SNAPSHOT_DIR=$PWD/snapshot ./run-services.sh
+
+The same seed and sizes always produce the same records. Ids reference each other
+across services: bookings point at real sessions, students and availability
+slots, enrolled counts match the confirmed/completed bookings, completed bookings
+show up as attended sessions, and session group chats contain the session's tutor
+and booked students. One <service>.snap file is written per service (see
+common/snapshot.py) and merged into that service's in-memory tables at startup.
+
+Generated accounts log in as student<N>@hcmut.edu.vn / demo123 and
+tutor<N>@hcmut.edu.vn / tutor123 (N from 1), next to the hard-coded demo users.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SERVICES_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SERVICES_DIR))
+from common.snapshot import write_snapshot
+
+GENERATOR_VERSION = 1
+
+FIRST_NAMES = ["An", "Binh", "Chi", "Dung", "Giang", "Ha", "Hieu", "Hoa", "Khanh", "Lan", "Linh", "Long",
+               "Mai", "Minh", "Nam", "Ngoc", "Phuc", "Quang", "Son", "Thao", "Trang", "Tuan", "Vy", "Yen"]
+LAST_NAMES = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Phan", "Vu", "Vo", "Dang", "Bui", "Do", "Ho", "Ngo", "Duong"]
+MAJORS = ["Computer Science", "Computer Engineering", "Electrical Engineering", "Mechanical Engineering",
+          "Chemical Engineering", "Civil Engineering", "Applied Mathematics", "Industrial Management"]
+COURSES = [
+    ("CO1005", "Introduction to Computing"), ("CO1007", "Discrete Structures"), ("CO2003", "Data Structures and Algorithms"),
+    ("CO2007", "Computer Architecture"), ("CO2011", "Mathematical Modeling"), ("CO2013", "Operating Systems"),
+    ("CO2017", "Operating Systems Lab"), ("CO2039", "Advanced Programming"), ("CO3001", "Software Engineering"),
+    ("CO3005", "Software Engineering"), ("CO3021", "Database Management Systems"), ("CO3093", "Computer Networks"),
+    ("CO3117", "Machine Learning"), ("MT1003", "Calculus 1"), ("MT1005", "Calculus 2"), ("MT1007", "Linear Algebra"),
+    ("MT2013", "Probability and Statistics"), ("PH1003", "General Physics 1"), ("CH1003", "General Chemistry"),
+]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+ROOMS = ["Room B1-101", "Room B1-204", "Room B4-302", "Room C5-110", "Library L2"]
+MESSAGES = [
+    "Welcome to the group!", "Reminder: bring questions for the next session.", "Can we go over last week's exercise?",
+    "Slides are uploaded to the library.", "Thanks, that helped a lot.", "Is the session still online this week?",
+    "I'll be a few minutes late.", "Could you share the practice problems?", "See you on Monday.", "Good luck on the midterm!",
+]
+# booking status weights (confirmed/completed only while the session has room)
+BOOKING_STATUSES = ["pending", "confirmed", "completed", "cancelled", "rejected"]
+BOOKING_WEIGHTS = [20, 35, 25, 15, 5]
+
+
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def stamp(ts: float) -> str:
+    return (UNIX_EPOCH + timedelta(seconds=int(ts))).isoformat() + "Z"
+
+
+def person(rng: random.Random) -> str:
+    return f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+
+
+def generate(args: argparse.Namespace) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Build every service's tables: {service: {table name: table}}."""
+    rng = random.Random(args.seed)
+    epoch = datetime.strptime(args.epoch, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    span = args.days * 86400
+
+    auth_users: Dict[str, Dict[str, Any]] = {}
+    profiles: Dict[str, Dict[str, Any]] = {}
+    students: Dict[str, Dict[str, Any]] = {}
+    tutors: Dict[str, Dict[str, Any]] = {}
+
+    student_ids: List[str] = []
+    for n in range(1, args.students + 1):
+        sid = f"stu-{n:06d}"
+        name, major = person(rng), rng.choice(MAJORS)
+        email = f"student{n}@hcmut.edu.vn"
+        phone = f"+84 9{rng.randrange(10, 100)} {rng.randrange(100, 1000)} {rng.randrange(100, 1000)}"
+        me = {"id": sid, "fullName": name, "email": email, "studentId": str(2300000 + n),
+              "major": major, "phone": phone, "avatarUrl": None}
+        auth_users[email] = {"id": sid, "email": email, "password": "demo123", "role": "STUDENT",
+                             "name": name, "phone": phone, "major": major}
+        profiles[sid] = me
+        students[sid] = {
+            "me": {**me, "bio": ""},
+            "preferences": rng.sample(["Online", "On campus"], rng.randint(1, 2)),
+            "history": {"attendance": [], "bookings": []},
+            "bookedSessions": [],
+            "progress": [],
+            "stats": {"hoursStudied": 0, "sessionsAttended": 0},
+            "announcements": [],
+        }
+        student_ids.append(sid)
+
+    tutor_ids: List[str] = []
+    tutor_names: Dict[str, str] = {}
+    for n in range(1, args.tutors + 1):
+        tid = f"tut-{n:06d}"
+        name, major = person(rng), rng.choice(MAJORS)
+        email = f"tutor{n}@hcmut.edu.vn"
+        taught = rng.sample(COURSES, 3)
+        auth_users[email] = {"id": tid, "email": email, "password": "tutor123", "role": "TUTOR",
+                             "name": name, "phone": None, "major": major}
+        tutors[tid] = {
+            "me": {
+                "id": tid, "fullName": name, "email": email, "tutorId": str(2200000 + n), "major": major,
+                "phone": "", "avatarUrl": None, "bio": "", "languages": ["Vietnamese", "English"],
+                "skills": [], "courses": [title for _, title in taught], "teachingModes": ["online", "in-person"],
+            },
+            "stats": {"totalSessions": 0, "totalStudents": 0, "hoursTeaching": 0, "avgRating": round(rng.uniform(3.5, 5.0), 1)},
+            # course pool for this tutor's sessions; dropped before writing
+            "_courses": taught,
+        }
+        tutor_ids.append(tid)
+        tutor_names[tid] = name
+
+    # availability slots published into sessions, ids as publish_slot would make them
+    availability: Dict[str, Dict[str, Any]] = {}
+    sessions: Dict[str, Dict[str, Any]] = {}
+    session_ids: List[str] = []
+    for n in range(1, args.sessions + 1):
+        tid = tutor_ids[int(rng.random() * len(tutor_ids))]
+        code, title = rng.choice(tutors[tid]["_courses"])
+        slot_id = f"avail-g{n:07d}"
+        day, start = rng.choice(DAYS), f"{rng.randint(7, 19):02d}:00"
+        duration = rng.choice([60, 90, 120])
+        mode = rng.choice(["online", "offline"])
+        location = rng.choice(ROOMS) if mode == "offline" else None
+        capacity = rng.randint(1, 10)
+        created_ts = epoch - rng.random() * span
+        created = stamp(created_ts)
+        availability.setdefault(tid, {
+            "slots": [],
+            "exceptions": [],
+            "policy": {"allowedHoursStart": "07:00", "allowedHoursEnd": "22:00", "maxSlotsPerDay": 8, "maxSlotsPerWeek": 30},
+        })["slots"].append({
+            "id": slot_id, "day": day, "date": None, "startTime": start, "duration": duration, "mode": mode,
+            "location": location, "capacity": capacity, "leadTime": 24, "cancelWindow": 12, "recurrence": "weekly",
+            "status": "published", "booked": False, "courseCode": code, "courseTitle": title, "publishedAt": created,
+        })
+        end = f"{int(start[:2]) + duration // 60:02d}:{duration % 60:02d}"
+        sessions[f"sess-{slot_id}"] = {
+            "id": f"sess-{slot_id}", "tutorId": tid, "tutorName": tutor_names[tid], "courseCode": code,
+            "courseTitle": title, "capacity": capacity, "enrolled": 0, "status": "active", "createdAt": created,
+            "date": None, "recurrence": "weekly",
+            "slots": [{"id": f"slot-{slot_id}", "day": day, "date": None, "startTime": start, "endTime": end,
+                       "mode": mode, "location": location}],
+            # back-references for bookings; dropped before writing
+            "_slot": availability[tid]["slots"][-1],
+            "_ts": created_ts,
+        }
+        session_ids.append(f"sess-{slot_id}")
+
+    bookings: Dict[str, Dict[str, Any]] = {}
+    attended: Dict[str, List[Dict[str, Any]]] = {}
+    members: Dict[str, List[str]] = {}
+    for n in range(1, args.bookings + 1 if session_ids and student_ids else 1):
+        session = sessions[session_ids[int(rng.random() * len(session_ids))]]
+        sid = student_ids[int(rng.random() * len(student_ids))]
+        status = rng.choices(BOOKING_STATUSES, BOOKING_WEIGHTS)[0]
+        if status in ("confirmed", "completed") and session["enrolled"] >= session["capacity"]:
+            status = "pending"
+        created_ts = session["_ts"] + rng.random() * (epoch - session["_ts"])
+        booking = {
+            "id": f"book-g{n:07d}", "sessionId": session["id"], "studentId": sid,
+            "studentName": profiles[sid]["fullName"], "studentEmail": profiles[sid]["email"],
+            "slotId": session["_slot"]["id"], "status": status, "message": rng.choice(MESSAGES),
+            "createdAt": stamp(created_ts),
+        }
+        if status in ("confirmed", "completed"):
+            booking["confirmedAt"] = stamp(created_ts + rng.randint(600, 172800))
+            session["enrolled"] += 1
+            session["_slot"]["booked"] = True
+            members.setdefault(session["id"], []).append(sid)
+            stats = tutors[session["tutorId"]]["stats"]
+            stats["totalStudents"] += 1
+            if status == "completed":
+                slot = session["slots"][0]
+                stats["hoursTeaching"] += session["_slot"]["duration"] // 60
+                attended.setdefault(sid, []).append({
+                    "id": f"att-g{n:07d}", "code": session["courseCode"], "title": session["courseTitle"],
+                    "tutor": session["tutorName"], "mode": slot["mode"], "completedAt": booking["confirmedAt"],
+                })
+                students[sid]["stats"]["sessionsAttended"] += 1
+                students[sid]["stats"]["hoursStudied"] += session["_slot"]["duration"] / 60
+        elif status == "cancelled":
+            booking["cancelledAt"] = stamp(created_ts + rng.randint(600, 172800))
+        bookings[booking["id"]] = booking
+
+    for session in sessions.values():
+        del session["_slot"], session["_ts"]
+        tutors[session["tutorId"]]["stats"]["totalSessions"] += 1
+    for tutor in tutors.values():
+        del tutor["_courses"]
+
+    # one group chat per session with its tutor and enrolled students; messages are
+    # spread over the chats and share sender dicts and content strings
+    conversations: Dict[str, Dict[str, Any]] = {}
+    chats = []
+    for session_id in session_ids:
+        session = sessions[session_id]
+        tid = session["tutorId"]
+        people = [tid] + members.get(session_id, [])
+        senders = [{"id": tid, "displayName": session["tutorName"], "role": "TUTOR"}]
+        senders += [{"id": sid, "displayName": profiles[sid]["fullName"], "role": "STUDENT"} for sid in people[1:]]
+        conv = {"id": f"group-{session_id}", "title": f"{session['courseCode']} - {session['courseTitle']}",
+                "type": "GROUP", "members": people, "messages": []}
+        conversations[conv["id"]] = conv
+        chats.append((conv, senders))
+    counts = [0] * len(chats)
+    # int(random() * n) rather than randrange(n): several times cheaper at 10M draws
+    for _ in range(args.messages if chats else 0):
+        counts[int(rng.random() * len(chats))] += 1
+    n = 0
+    for (conv, senders), count in zip(chats, counts):
+        ts = epoch - rng.random() * span
+        messages = conv["messages"]
+        for _ in range(count):
+            n += 1
+            ts += 30 + rng.random() * 7200
+            messages.append({"id": f"m-g{n:08d}", "content": MESSAGES[int(rng.random() * len(MESSAGES))],
+                             "createdAt": stamp(ts), "sender": senders[int(rng.random() * len(senders))]})
+
+    return {
+        "auth": {"USERS": auth_users},
+        "users": {"USERS": profiles},
+        "students": {"STUDENTS": students},
+        "tutors": {"TUTORS": tutors, "BOOKINGS": bookings},
+        "sessions": {"SESSIONS": sessions, "AVAILABILITY": availability, "ATTENDED": attended},
+        # read by both the messages and the students service
+        "messages": {"CONVERSATIONS": conversations},
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a seeded, referentially consistent dataset as per-service snapshot files.")
+    parser.add_argument("--out", default="snapshot", help="directory for the <service>.snap files")
+    parser.add_argument("--seed", default="0", help="same seed and sizes -> same dataset")
+    parser.add_argument("--tutors", type=int, default=500)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--epoch", default="2026-01-01", help="timestamps fall in the --days before this date (UTC)")
+    parser.add_argument("--days", type=int, default=180)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.tutors < 1 or args.students < 1:
+        raise SystemExit("[datagen] need at least one tutor and one student")
+    started = time.perf_counter()
+    dataset = generate(args)
+    print(f"[datagen] generated in {time.perf_counter() - started:.1f}s")
+    meta = {
+        "generator": GENERATOR_VERSION,
+        "seed": args.seed,
+        "epoch": args.epoch,
+        "days": args.days,
+        "scale": {k: getattr(args, k) for k in ("tutors", "students", "sessions", "bookings", "messages")},
+    }
+    for service, tables in dataset.items():
+        path = Path(args.out) / f"{service}.snap"
+        size = write_snapshot(path, service, tables, meta)
+        counts = ", ".join(f"{name}={len(table)}" for name, table in tables.items())
+        print(f"[datagen] {path} ({counts}) {size / 1e6:.1f} MB")
+    print(f"[datagen] done in {time.perf_counter() - started:.1f}s")
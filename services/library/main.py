@@ -1,11 +1,17 @@
 import os
+import sys
 from pathlib import Path
 from typing import Dict, List
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.metrics import install_metrics
+from common.tracing import install_tracing
+
 ROOT = Path(__file__).resolve().parents[2]
 ASSETS_DIR = ROOT / "apps" / "web" / "static" / "assets"
 
@@ -24,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "library")
+TRACER = install_tracing(app, "library")
+
 
 def asset(name: str) -> str:
     return str((ASSETS_DIR / name).resolve())
@@ -70,7 +79,10 @@ async def health():
 
 
 @app.get("/resources")
-async def list_resources(sessionId: str = Query(..., alias="sessionId")):
+async def list_resources(response: Response, sessionId: str = Query(..., alias="sessionId")):
+    # static catalogue: safe to share through the gateway cache
+    response.headers["Cache-Control"] = "public, max-age=300"
+    response.headers["X-Cache-Tags"] = "library"
     data = LIBRARY_BY_SESSION.get(sessionId)
     if not data:
         return {"ok": True, "syllabus": [], "videos": [], "tests": [], "resources": []}
@@ -0,0 +1,329 @@
+"""
+Load generator for the whole service mesh, driven through the gateway.
+
+    python services/loadtest.py --duration 30 --students 40 --tutors 5 --out bench.json
+    python services/loadtest.py --in-process ...   # drive services/monolith.py in this process (ASGITransport)
+    python services/loadtest.py --boot ...         # start every service with uvicorn first, stop them afterwards
+
+Virtual students poll browse (revalidating its ETag) and their bookings, read the messaging sidebar and
+their profile, and run booking create -> (tutor confirm) -> cancel flows;
+virtual tutors poll their bookings, sessions and availability. Booking and
+tutor session polls fetch the full list once, then only changes (?since=). The JSON report
+has throughput, p50/p95/p99 latency and error rates per endpoint, so two runs
+can be diffed between releases.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+SERVICES_DIR = Path(__file__).resolve().parent
+# (directory, port, health path) as started by run-services.sh
+BOOT_SERVICES = [
+    ("auth", 4010, "/health"),
+    ("students", 4011, "/health"),
+    ("users", 4015, "/health"),
+    ("sessions", 4016, "/health"),
+    ("messages", 4017, "/health"),
+    ("library", 4018, "/health"),
+    ("admin", 4019, "/api/health"),
+    ("tutors", 4099, "/health"),
+    ("api-gateway", 4000, "/health"),
+]
+DEFAULT_STUDENTS = ["student@hcmut.edu.vn:demo123"]
+DEFAULT_TUTORS = ["tutor@hcmut.edu.vn:tutor123"]
+
+
+class Recorder:
+    """Per-endpoint latency samples and status counts for the measured window."""
+
+    def __init__(self, preflight_origin: Optional[str] = None):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        # send a CORS preflight before every write, as a browser without a cached preflight would
+        self.preflight_origin = preflight_origin
+
+    async def call(self, client: httpx.AsyncClient, method: str, path: str, label: Optional[str] = None, **kwargs: Any) -> Optional[httpx.Response]:
+        label = label or f"{method} {path.split('?')[0]}"
+        if self.preflight_origin and method not in ("GET", "HEAD", "OPTIONS"):
+            await self.call(client, "OPTIONS", path, label="OPTIONS " + label.split(" ", 1)[1], headers={
+                "Origin": self.preflight_origin,
+                "Access-Control-Request-Method": method,
+                "Access-Control-Request-Headers": "content-type",
+            })
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, path, **kwargs)
+            status = str(resp.status_code)
+        except httpx.HTTPError:
+            resp, status = None, "error"
+        self.samples[label].append(time.perf_counter() - started)
+        self.statuses[label][status] += 1
+        return resp
+
+    @staticmethod
+    def percentile(ordered: List[float], pct: float) -> float:
+        # nearest-rank, in milliseconds
+        return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000, 3)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = errors = 0
+        for label in sorted(self.samples):
+            ordered = sorted(self.samples[label])
+            statuses = self.statuses[label]
+            failed = sum(n for status, n in statuses.items() if status == "error" or int(status) >= 400)
+            total += len(ordered)
+            errors += failed
+            endpoints[label] = {
+                "count": len(ordered),
+                "rps": round(len(ordered) / elapsed, 2),
+                "errors": failed,
+                "errorRate": round(failed / len(ordered), 4),
+                "statuses": dict(sorted(statuses.items())),
+                "latencyMs": {
+                    "p50": self.percentile(ordered, 50),
+                    "p95": self.percentile(ordered, 95),
+                    "p99": self.percentile(ordered, 99),
+                    "max": round(ordered[-1] * 1000, 3),
+                    "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+                },
+            }
+        return {
+            "totals": {
+                "requests": total,
+                "rps": round(total / elapsed, 2) if elapsed else 0.0,
+                "errors": errors,
+                "errorRate": round(errors / total, 4) if total else 0.0,
+            },
+            "endpoints": endpoints,
+        }
+
+
+async def poll(client: httpx.AsyncClient, rec: Recorder, path: str, versions: Dict[str, int]) -> None:
+    """GET a list like a delta-syncing client: in full once (and after a resync), then ?since= the last version."""
+    version = versions.get(path)
+    if version is None:
+        resp = await rec.call(client, "GET", path)
+    else:
+        resp = await rec.call(client, "GET", f"{path}?since={version}", label=f"GET {path}?since")
+    if resp is None or resp.status_code != 200:
+        return
+    body = resp.json()
+    if body.get("resync"):
+        versions.pop(path, None)
+    elif "version" in body:
+        versions[path] = body["version"]
+
+
+async def login(client: httpx.AsyncClient, credentials: str) -> None:
+    email, _, password = credentials.partition(":")
+    resp = await client.post("/auth/login", json={"email": email, "password": password})
+    if resp.status_code != 200:
+        raise SystemExit(f"[loadtest] login failed for {email}: {resp.status_code} {resp.text[:200]}")
+
+
+Action = Callable[[], Awaitable[None]]
+
+
+async def run_user(actions: List[Tuple[Action, int]], rng: random.Random, deadline: float, think: float) -> None:
+    funcs = [a for a, _ in actions]
+    weights = [w for _, w in actions]
+    while time.monotonic() < deadline:
+        await rng.choices(funcs, weights)[0]()
+        if think > 0:
+            await asyncio.sleep(rng.expovariate(1 / think))
+
+
+def student_actions(client: httpx.AsyncClient, tutors: List[httpx.AsyncClient], rec: Recorder, rng: random.Random, confirm_ratio: float) -> List[Tuple[Action, int]]:
+    # revalidate the listing like a browser holding the last response
+    browse_etag: Dict[str, str] = {}
+    versions: Dict[str, int] = {}
+
+    async def browse() -> None:
+        headers = {"If-None-Match": browse_etag["value"]} if browse_etag else {}
+        resp = await rec.call(client, "GET", "/sessions/browse", headers=headers)
+        if resp is not None and resp.headers.get("etag"):
+            browse_etag["value"] = resp.headers["etag"]
+
+    async def bookings() -> None:
+        await poll(client, rec, "/bookings", versions)
+
+    async def sidebar() -> None:
+        await rec.call(client, "GET", "/students/messaging/sidebar")
+
+    async def profile() -> None:
+        await rec.call(client, "GET", "/students/profile")
+
+    async def me() -> None:
+        await rec.call(client, "GET", "/auth/me")
+
+    async def booking_flow() -> None:
+        resp = await rec.call(client, "GET", "/sessions/browse?hasCapacity=true&limit=50", label="GET /sessions/browse (page)")
+        if resp is None or resp.status_code != 200:
+            return
+        open_sessions = resp.json().get("sessions", [])
+        if not open_sessions:
+            return
+        session = rng.choice(open_sessions)
+        resp = await rec.call(client, "POST", "/bookings", json={"sessionId": session["id"], "message": "load test"})
+        if resp is None or resp.status_code != 200:
+            return
+        booking_id = resp.json()["booking"]["id"]
+        if tutors and rng.random() < confirm_ratio:
+            await rec.call(rng.choice(tutors), "POST", f"/tutors/tutor/bookings/{booking_id}/confirm", label="POST /tutors/tutor/bookings/{id}/confirm")
+        await rec.call(client, "POST", f"/bookings/{booking_id}/cancel", label="POST /bookings/{id}/cancel", json={"reason": "load test"})
+
+    return [(browse, 40), (bookings, 25), (sidebar, 10), (profile, 10), (me, 5), (booking_flow, 10)]
+
+
+def tutor_actions(client: httpx.AsyncClient, rec: Recorder) -> List[Tuple[Action, int]]:
+    versions: Dict[str, int] = {}
+
+    async def bookings() -> None:
+        await poll(client, rec, "/tutors/tutor/bookings", versions)
+
+    async def sessions() -> None:
+        await poll(client, rec, "/sessions/tutor/sessions", versions)
+
+    async def availability() -> None:
+        await rec.call(client, "GET", "/sessions/availability")
+
+    return [(bookings, 50), (sessions, 30), (availability, 20)]
+
+
+async def run_load(args: argparse.Namespace, make_client: Callable[[], httpx.AsyncClient]) -> Dict[str, Any]:
+    rec = Recorder(args.origin if args.preflight else None)
+    student_logins = args.student or DEFAULT_STUDENTS
+    tutor_logins = args.tutor or DEFAULT_TUTORS
+    students = [make_client() for _ in range(args.students)]
+    tutors = [make_client() for _ in range(args.tutors)]
+    try:
+        await asyncio.gather(
+            *(login(c, student_logins[i % len(student_logins)]) for i, c in enumerate(students)),
+            *(login(c, tutor_logins[i % len(tutor_logins)]) for i, c in enumerate(tutors)),
+        )
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = []
+        for i, client in enumerate(students):
+            rng = random.Random(f"{args.seed}:student:{i}")
+            users.append(run_user(student_actions(client, tutors, rec, rng, args.confirm_ratio), rng, deadline, args.think))
+        for i, client in enumerate(tutors):
+            rng = random.Random(f"{args.seed}:tutor:{i}")
+            users.append(run_user(tutor_actions(client, rec), rng, deadline, args.think))
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - started
+    finally:
+        await asyncio.gather(*(c.aclose() for c in students + tutors))
+    return rec.report(elapsed)
+
+
+def boot_services() -> List[subprocess.Popen]:
+    procs = []
+    for directory, port, _ in BOOT_SERVICES:
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=SERVICES_DIR / directory,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+    deadline = time.monotonic() + 30
+    for directory, port, health in BOOT_SERVICES:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}{health}", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                stop_services(procs)
+                raise SystemExit(f"[loadtest] {directory} did not come up on :{port}")
+            time.sleep(0.2)
+    return procs
+
+
+def stop_services(procs: List[subprocess.Popen]) -> None:
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.in_process:
+        sys.path.insert(0, str(SERVICES_DIR))
+        from monolith import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            return await run_load(args, lambda: httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=args.timeout))
+    return await run_load(args, lambda: httpx.AsyncClient(base_url=args.target, timeout=args.timeout))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a realistic student/tutor mix through the gateway and report per-endpoint latency.")
+    parser.add_argument("--target", default=os.getenv("LOADTEST_TARGET", "http://localhost:4000"), help="gateway base URL")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--boot", action="store_true", help="start every service with uvicorn (run-services.sh ports) for the run")
+    mode.add_argument("--in-process", action="store_true", help="run services/monolith.py in this process instead of over HTTP")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--students", type=int, default=20, help="concurrent virtual students")
+    parser.add_argument("--tutors", type=int, default=3, help="concurrent virtual tutors")
+    parser.add_argument("--student", action="append", help="email:password to log students in as (repeatable, round-robin)")
+    parser.add_argument("--tutor", action="append", help="email:password to log tutors in as (repeatable, round-robin)")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between actions in seconds (0 = closed loop)")
+    parser.add_argument("--confirm-ratio", type=float, default=0.5, help="share of created bookings a tutor confirms before the cancel")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", default="0", help="seed for the action mix")
+    parser.add_argument("--preflight", action="store_true", help="send a CORS preflight (OPTIONS) before every write")
+    parser.add_argument("--origin", default="http://localhost:5173", help="Origin header for --preflight")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    procs = boot_services() if args.boot else []
+    try:
+        result = asyncio.run(main(args))
+    finally:
+        stop_services(procs)
+    report = {
+        "meta": {
+            "startedAt": started_at,
+            "mode": "in-process" if args.in_process else "http",
+            "target": None if args.in_process else args.target,
+            "duration": args.duration,
+            "students": args.students,
+            "tutors": args.tutors,
+            "think": args.think,
+            "seed": args.seed,
+            "preflight": args.origin if args.preflight else None,
+        },
+        **result,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"[loadtest] {result['totals']['requests']} requests, {result['totals']['rps']} req/s, "
+              f"error rate {result['totals']['errorRate']} -> {args.out}")
+    else:
+        print(text)
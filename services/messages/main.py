@@ -1,13 +1,18 @@
 import os
+import sys
+from pathlib import Path
 from typing import Dict, List
 
-import jwt
 from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-ALGORITHM = "HS256"
-COOKIE_NAME = "access_token"
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.identity import identity_claims
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
+
 
 app = FastAPI(title="Messages service", version="1.0.0")
 
@@ -24,6 +29,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "messages")
+TRACER = install_tracing(app, "messages")
+
 
 CONVERSATIONS: Dict[str, Dict[str, object]] = {
     "group-1": {
@@ -59,15 +67,12 @@ CONVERSATIONS: Dict[str, Dict[str, object]] = {
     },
 }
 
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("messages", CONVERSATIONS=CONVERSATIONS)
+
 
 def require_user(request: Request) -> str:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
+    payload = identity_claims(request)
     uid = payload.get("sub")
     if not uid:
         raise HTTPException(status_code=401, detail="unauthorized")
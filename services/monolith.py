@@ -0,0 +1,92 @@
+"""
+Monolith mode: every service in one process behind one ASGI app.
+
+    cd services && uvicorn monolith:app --port 4000
+    # or: python services/monolith.py
+
+The gateway is served at the root exactly as on :4000 in the multi-process
+layout (run-services.sh), and each service is also mounted at /_svc/<name>
+like its own port would be. Gateway upstream calls and the tutors -> sessions
+calls go through httpx.ASGITransport into the imported apps instead of over
+loopback HTTP.
+"""
+import importlib.util
+import os
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+SERVICES_DIR = Path(__file__).resolve().parent
+# gateway upstream name -> service directory
+SERVICES = {
+    "auth": "auth",
+    "students": "students",
+    "users": "users",
+    "sessions": "sessions",
+    "messages": "messages",
+    "library": "library",
+    "admin": "admin",
+    "tutors": "tutors",
+}
+
+
+def load_service(name: str, directory: str) -> ModuleType:
+    """Import services/<directory>/main.py under a unique module name (every service's module is 'main')."""
+    path = SERVICES_DIR / directory / "main.py"
+    # main.py files import their sibling modules by bare name
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"{name}_main", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def in_process(app) -> httpx.ASGITransport:
+    # an unhandled error comes back as the app's 500 response, as it would over the network
+    return httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+
+def build() -> Starlette:
+    services = {name: load_service(name, directory) for name, directory in SERVICES.items()}
+    gateway = load_service("gateway", "api-gateway")
+
+    for name, module in services.items():
+        pool = gateway.POOLS.get(name)
+        if pool is not None:
+            pool.transport = in_process(module.app)
+    services["tutors"].SESSIONS_TRANSPORT = in_process(services["sessions"].app)
+
+    # ASGITransport buffers whole responses, so an endless SSE relay cannot run
+    # through it; in-process publishers write straight into the gateway hub instead
+    relayed = []
+    for name in gateway.EVENT_SOURCES:
+        module = services.get(name)
+        if module is not None and hasattr(module, "EVENTS"):
+            module.EVENTS = gateway.EVENT_HUB
+        else:
+            relayed.append(name)
+    gateway.EVENT_SOURCES[:] = relayed
+
+    routes = [Mount(f"/_svc/{name}", app=module.app) for name, module in services.items()]
+    routes.append(Mount("", app=gateway.app))
+    # only the gateway has startup work (pools, health probes, event relays)
+    return Starlette(routes=routes, lifespan=gateway.lifespan)
+
+
+app = build()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "4000")),
+        reload=False,
+    )
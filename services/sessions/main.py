@@ -1,14 +1,35 @@
+import asyncio
+import base64
+import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-import jwt
-from fastapi import FastAPI, HTTPException, Request
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-ALGORITHM = "HS256"
-COOKIE_NAME = "access_token"
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.changelog import ChangeLog
+from common.etag import etag_for, etag_matches
+from common.events import EventHub, sse_response
+from common.identity import identity_claims
+from common.indexed import Entry, IndexedTable, SortedIndex
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
+
+# Gateway response cache: browse/detail are shared across users and purged on any write
+CACHE_TAG = "sessions"
+CACHE_CONTROL = os.getenv("SESSIONS_CACHE_CONTROL", "s-maxage=30, max-age=0")
+# Largest page /browse?limit= will return
+BROWSE_MAX_LIMIT = int(os.getenv("SESSIONS_BROWSE_MAX_LIMIT", "200"))
+# Writes kept for ?since= delta polls; a client further behind is told to resync
+CHANGE_LOG_SIZE = int(os.getenv("SESSIONS_CHANGE_LOG_SIZE", "10000"))
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
 
 app = FastAPI(title="Sessions service", version="2.0.0")
 
@@ -25,6 +46,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "sessions")
+TRACER = install_tracing(app, "sessions")
+
+# Enroll/publish changes pushed to the gateway, which fans them out to browsers
+EVENTS = EventHub()
+
+
+@app.middleware("http")
+async def purge_gateway_cache(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in {"GET", "HEAD", "OPTIONS"} and response.status_code < 400:
+        response.headers["X-Cache-Purge"] = CACHE_TAG
+    return response
+
 
 # ==================== PYDANTIC MODELS ====================
 
@@ -67,13 +102,7 @@ class ExceptionCreate(BaseModel):
 # ==================== HELPER FUNCTIONS ====================
 
 def decode_token(request: Request) -> Dict:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
+    return identity_claims(request)
 
 
 def require_tutor(request: Request) -> Dict:
@@ -87,12 +116,56 @@ def require_auth(request: Request) -> Dict:
     return decode_token(request)
 
 
+def require_service(request: Request) -> Dict:
+    payload = decode_token(request)
+    if payload.get("role") != "SERVICE":
+        raise HTTPException(status_code=403, detail="service access required")
+    return payload
+
+
+def publish_session(event_type: str, session: Dict[str, Any]) -> None:
+    # every student can browse sessions; the owning tutor manages them
+    EVENTS.publish(event_type, {"session": session}, users=[session.get("tutorId")], roles=["STUDENT"])
+
+
 def iso(days_from_now: int, hour: int = 9) -> str:
     return (
         datetime.utcnow() + timedelta(days=days_from_now)
     ).replace(hour=hour, minute=0, second=0, microsecond=0).isoformat() + "Z"
 
 
+def first_slot(session: Dict[str, Any]) -> Dict[str, Any]:
+    slots = session.get("slots")
+    return slots[0] if slots else {}
+
+
+def session_date(session: Dict[str, Any]) -> Optional[str]:
+    """Calendar date of a one-time session; None for recurring ones."""
+    return session.get("date") or first_slot(session).get("date")
+
+
+def encode_cursor(entry: Entry) -> str:
+    (created_at, rank), session_id = entry
+    return base64.urlsafe_b64encode(json.dumps([created_at, rank, session_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Entry:
+    try:
+        created_at, rank, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return ((str(created_at), int(rank)), str(session_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def parse_day(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD")
+
+
 def calculate_end_time(start_time: str, duration: int) -> str:
     h, m = map(int, start_time.split(":"))
     total_minutes = h * 60 + m + duration
@@ -105,8 +178,8 @@ def calculate_end_time(start_time: str, duration: int) -> str:
 
 
 
-# Sessions storage (what students browse)
-SESSIONS: Dict[str, Dict[str, Any]] = {
+# Sessions storage (what students browse), indexed for per-tutor, per-status and per-course lookups
+SESSIONS: IndexedTable = IndexedTable(("tutorId", "status", "courseCode"), {
     "sess-001": {
         "id": "sess-001",
         "tutorId": "tut-001",
@@ -135,7 +208,7 @@ SESSIONS: Dict[str, Dict[str, Any]] = {
             {"id": "slot-002", "day": "Wednesday", "startTime": "14:00", "endTime": "16:00", "mode": "online", "location": None},
         ],
     },
-}
+})
 
 # Tutor availability storage (what tutor configures)
 AVAILABILITY: Dict[str, Dict[str, Any]] = {
@@ -211,11 +284,124 @@ ATTENDED: Dict[str, List[Dict[str, Any]]] = {
     ],
 }
 
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("sessions", SESSIONS=SESSIONS, AVAILABILITY=AVAILABILITY, ATTENDED=ATTENDED)
+
+# Global slot id -> owning tutor id, so internal calls find a slot without the caller naming the tutor
+SLOT_OWNERS: Dict[str, str] = {}
+
+
+def index_slots() -> None:
+    """Key every tutor's slots by id (seed and snapshot data store lists) and fill SLOT_OWNERS."""
+    for tutor_id, data in AVAILABILITY.items():
+        if isinstance(data["slots"], list):
+            data["slots"] = {slot["id"]: slot for slot in data["slots"]}
+        for slot_id in data["slots"]:
+            SLOT_OWNERS[slot_id] = tutor_id
+
+
+index_slots()
+
+def json_bytes(value: Any) -> bytes:
+    # same encoding as FastAPI's JSONResponse, so the bytes match a regular /browse reply
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def assemble_browse(fragments: List[bytes], version: int) -> Tuple[bytes, str]:
+    """The /browse body from per-session JSON fragments, and its ETag; touches only bytes, so it runs off the loop."""
+    body = b"".join((b'{"ok":true,"sessions":[', b",".join(fragments), b'],"nextCursor":null,"version":', str(version).encode("ascii"), b"}"))
+    return body, etag_for(body)
+
+
+class BrowseSnapshot:
+    """
+    The unfiltered /browse body, kept ready to serve.
+
+    Each active session's JSON is cached as a fragment. The SESSIONS watcher
+    drops the fragment of a session that changed and, if it is or was active,
+    bumps version. The first poll that finds the body behind version starts
+    a rebuild: missing fragments are serialized on the loop, where the rows
+    are consistent, in chunks that yield to other requests. The body is then
+    joined and hashed in a worker thread. Until the rebuild finishes, polls
+    get the previous body and ETag, flagged stale.
+    """
+
+    CHUNK = 500
+
+    def __init__(self):
+        self.version = 0
+        self.built_version = -1
+        self.body = b""
+        self.etag = ""
+        self.builds = 0
+        self._fragments: Dict[str, bytes] = {}
+        self._building: Optional["asyncio.Future[None]"] = None
+
+    def touch(self, key: str, old: Optional[Dict[str, Any]], row: Optional[Dict[str, Any]]) -> None:
+        self._fragments.pop(key, None)
+        if (old is not None and old.get("status") == "active") or (row is not None and row.get("status") == "active"):
+            self.version += 1
+
+    async def current(self) -> Tuple[bytes, str, bool]:
+        """(body, ETag, fresh): the latest finished body, starting a rebuild when it is behind."""
+        if self.built_version != self.version and self._building is None:
+            self._building = asyncio.ensure_future(self.rebuild())
+        if self.built_version < 0:
+            # nothing built yet: this poll has to wait for the first body
+            await asyncio.shield(self._building)
+        return self.body, self.etag, self.built_version == self.version
+
+    async def rebuild(self) -> None:
+        try:
+            version = self.version
+            # rows written after this point may already be in the body; a client
+            # syncing from this version gets them again, but never misses one
+            changes_version = SESSION_CHANGES.version
+            keys = list(BROWSE_INDEX.walk(BROWSE_INDEX.select(), descending=True))
+            fragments: List[bytes] = []
+            serialized = 0
+            for key in keys:
+                fragment = self._fragments.get(key)
+                if fragment is None:
+                    if key not in BROWSE_INDEX:
+                        # deleted or no longer active while an earlier chunk yielded
+                        continue
+                    fragment = self._fragments[key] = json_bytes(browse_entry(SESSIONS[key]))
+                    serialized += 1
+                    if serialized % self.CHUNK == 0:
+                        await asyncio.sleep(0)
+                fragments.append(fragment)
+            self.body, self.etag = await run_in_threadpool(assemble_browse, fragments, changes_version)
+            self.built_version = version
+            self.builds += 1
+        finally:
+            self._building = None
+
+
+# Active sessions newest first, overall and per facet, for /browse pages and filters.
+# Sessions created together (publish-all) share createdAt; the negated insertion
+# position lists them in SESSIONS order, as the stable sort of the old listing did.
+BROWSE_INDEX = SortedIndex(
+    SESSIONS,
+    sort_key=lambda s: (s.get("createdAt") or "", -SESSIONS.positions[s["id"]]),
+    facets={
+        "courseCode": lambda s: s.get("courseCode"),
+        "tutorId": lambda s: s.get("tutorId"),
+        "mode": lambda s: (first_slot(s).get("mode") or "").lower(),
+        "day": lambda s: (first_slot(s).get("day") or "").lower(),
+    },
+    include=lambda s: s.get("status") == "active",
+)
+BROWSE_SNAPSHOT = BrowseSnapshot()
+SESSIONS.watchers.append(BROWSE_SNAPSHOT.touch)
+# Every SESSIONS write, for ?since= on /browse and /tutor/sessions
+SESSION_CHANGES = ChangeLog(SESSIONS, CHANGE_LOG_SIZE)
+
 
 def ensure_availability(tutor_id: str) -> Dict[str, Any]:
     if tutor_id not in AVAILABILITY:
         AVAILABILITY[tutor_id] = {
-            "slots": [],
+            "slots": {},
             "exceptions": [],
             "policy": {
                 "allowedHoursStart": "07:00",
@@ -227,6 +413,24 @@ def ensure_availability(tutor_id: str) -> Dict[str, Any]:
     return AVAILABILITY[tutor_id]
 
 
+def add_slot(tutor_id: str, slot: Dict[str, Any]) -> None:
+    ensure_availability(tutor_id)["slots"][slot["id"]] = slot
+    SLOT_OWNERS[slot["id"]] = tutor_id
+
+
+def remove_slot(tutor_id: str, slot_id: str) -> None:
+    AVAILABILITY[tutor_id]["slots"].pop(slot_id, None)
+    SLOT_OWNERS.pop(slot_id, None)
+
+
+def find_slot(slot_id: str) -> Optional[Dict[str, Any]]:
+    """Any tutor's slot by id, for the internal endpoints."""
+    tutor_id = SLOT_OWNERS.get(slot_id)
+    if tutor_id is None:
+        return None
+    return AVAILABILITY[tutor_id]["slots"].get(slot_id)
+
+
 
 # ==================== HEALTH CHECK ====================
 
@@ -245,11 +449,12 @@ async def get_availability(request: Request):
     print(f"[sessions] GET /availability for tutor_id={tutor_id}")
     
     data = ensure_availability(tutor_id)
-    week_usage = len([s for s in data["slots"] if s.get("status") == "published"])
+    slots = list(data["slots"].values())
+    week_usage = len([s for s in slots if s.get("status") == "published"])
     
     return {
         "ok": True,
-        "slots": data["slots"],
+        "slots": slots,
         "exceptions": data["exceptions"],
         "policy": data["policy"],
         "weekUsage": week_usage,
@@ -294,7 +499,7 @@ async def add_availability_slot(body: SlotCreate, request: Request):
         "createdAt": datetime.utcnow().isoformat() + "Z",
     }
     
-    data["slots"].append(new_slot)
+    add_slot(tutor_id, new_slot)
     print(f"[sessions] Added slot {slot_id}")
     
     return {"ok": True, "slot": new_slot}
@@ -308,7 +513,7 @@ async def update_availability_slot(slot_id: str, body: SlotUpdate, request: Requ
     print(f"[sessions] PUT /availability/slots/{slot_id} for tutor_id={tutor_id}")
     
     data = ensure_availability(tutor_id)
-    slot = next((s for s in data["slots"] if s["id"] == slot_id), None)
+    slot = data["slots"].get(slot_id)
     
     if not slot:
         raise HTTPException(status_code=404, detail="slot not found")
@@ -334,7 +539,7 @@ async def delete_availability_slot(slot_id: str, request: Request):
     print(f"[sessions] DELETE /availability/slots/{slot_id} for tutor_id={tutor_id}")
     
     data = ensure_availability(tutor_id)
-    slot = next((s for s in data["slots"] if s["id"] == slot_id), None)
+    slot = data["slots"].get(slot_id)
     
     if not slot:
         raise HTTPException(status_code=404, detail="slot not found")
@@ -348,7 +553,7 @@ async def delete_availability_slot(slot_id: str, request: Request):
         del SESSIONS[session_id]
         print(f"[sessions] Also deleted session {session_id}")
     
-    data["slots"] = [s for s in data["slots"] if s["id"] != slot_id]
+    remove_slot(tutor_id, slot_id)
     
     return {"ok": True}
 
@@ -362,7 +567,7 @@ async def publish_slot(slot_id: str, request: Request):
     print(f"[sessions] POST /availability/slots/{slot_id}/publish for tutor_id={tutor_id}")
     
     data = ensure_availability(tutor_id)
-    slot = next((s for s in data["slots"] if s["id"] == slot_id), None)
+    slot = data["slots"].get(slot_id)
     
     if not slot:
         raise HTTPException(status_code=404, detail="slot not found")
@@ -404,6 +609,7 @@ async def publish_slot(slot_id: str, request: Request):
     
     SESSIONS[session_id] = new_session
     print(f"[sessions] Created session {session_id} with date={slot.get('date')}")
+    publish_session("session.published", new_session)
     
     return {"ok": True, "slot": slot, "session": new_session}
 
@@ -420,7 +626,7 @@ async def publish_all_slots(request: Request):
     count = 0
     now = datetime.utcnow().isoformat() + "Z"
     
-    for slot in data["slots"]:
+    for slot in data["slots"].values():
         if slot.get("status") == "unpublished":
             slot["status"] = "published"
             slot["publishedAt"] = now
@@ -455,6 +661,7 @@ async def publish_all_slots(request: Request):
             }
             
             SESSIONS[session_id] = new_session
+            publish_session("session.published", new_session)
             count += 1
             print(f"[sessions] Created session {session_id} with date={slot.get('date')}")
     
@@ -469,9 +676,10 @@ async def bulk_delete_unpublished(request: Request):
     print(f"[sessions] DELETE /availability/bulk-delete-unpublished for tutor_id={tutor_id}")
     
     data = ensure_availability(tutor_id)
-    original_count = len(data["slots"])
-    data["slots"] = [s for s in data["slots"] if s.get("status") != "unpublished" or s.get("booked")]
-    deleted_count = original_count - len(data["slots"])
+    doomed = [s["id"] for s in data["slots"].values() if s.get("status") == "unpublished" and not s.get("booked")]
+    for slot_id in doomed:
+        remove_slot(tutor_id, slot_id)
+    deleted_count = len(doomed)
     
     return {"ok": True, "deletedCount": deleted_count}
 
@@ -524,32 +732,105 @@ async def delete_exception(exc_id: str, request: Request):
 
 # ==================== PUBLIC SESSION ENDPOINTS (for Students) ====================
 
+def browse_entry(s: Dict[str, Any]) -> Dict[str, Any]:
+    session_data = {
+        **s,
+        "availableSlots": s["capacity"] - s["enrolled"],
+    }
+    # Include date from slot if available
+    if session_date(s):
+        session_data["date"] = session_date(s)
+    return session_data
+
+
 @app.get("/browse")
-async def browse_sessions(request: Request):
-    """GET /sessions/browse - Students browse all active sessions"""
+async def browse_sessions(
+    request: Request,
+    response: Response,
+    courseCode: Optional[str] = None,
+    tutorId: Optional[str] = None,
+    mode: Optional[str] = None,
+    day: Optional[str] = None,
+    dateFrom: Optional[str] = None,
+    dateTo: Optional[str] = None,
+    hasCapacity: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=BROWSE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+):
+    """
+    GET /sessions/browse - Students browse active sessions, newest first
+
+    Filters: courseCode, tutorId, mode, day, dateFrom/dateTo (YYYY-MM-DD; recurring
+    sessions match when their weekday falls in the range) and hasCapacity.
+    Without limit every match is returned; with limit, one page plus a
+    nextCursor to pass back as cursor for the next one. The unfiltered listing
+    comes from BROWSE_SNAPSHOT with an ETag and honours If-None-Match. Every
+    listing carries a version; pass it back as since, with the same filters,
+    to get only the matching sessions changed after it (and the ids of those
+    no longer listed) from SESSION_CHANGES. since does not take limit or cursor.
+    """
     _ = require_auth(request)
-    
+    if since is not None and (limit is not None or cursor):
+        raise HTTPException(status_code=400, detail="since cannot be combined with limit or cursor")
+    if not request.query_params:
+        # the listing every student polls: shared bytes, revalidated by ETag
+        body, etag, fresh = await BROWSE_SNAPSHOT.current()
+        # a body still being rebuilt is served, but not cached by the gateway past the write
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL if fresh else "no-cache", "X-Cache-Tags": CACHE_TAG}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    facets = {
+        name: value
+        for name, value in (("courseCode", courseCode), ("tutorId", tutorId), ("mode", mode and mode.lower()), ("day", day and day.lower()))
+        if value
+    }
+    after = decode_cursor(cursor) if cursor else None
+    first, last = parse_day(dateFrom, "dateFrom"), parse_day(dateTo, "dateTo")
+    weekdays = None
+    if first and last and (last - first).days < 6:
+        weekdays = {WEEKDAYS[(first + timedelta(days=n)).weekday()] for n in range((last - first).days + 1)}
+    
+    def matches(s: Dict[str, Any], values: Dict[str, Any]) -> bool:
+        """The filters, given the facet values the session is filed under."""
+        if any(values[name] != value for name, value in facets.items()):
+            return False
+        if hasCapacity and s["enrolled"] >= s["capacity"]:
+            return False
+        if first or last:
+            when = session_date(s)
+            if when is None:
+                return weekdays is None or values["day"] in weekdays
+            return not ((first and when[:10] < first.isoformat()) or (last and when[:10] > last.isoformat()))
+        return True
+    
+    if since is not None:
+        return SESSION_CHANGES.delta(
+            since,
+            "sessions",
+            browse_entry,
+            keep=lambda s: BROWSE_INDEX.include(s) and matches(s, {name: facet(s) for name, facet in BROWSE_INDEX.facets.items()}),
+        )
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["X-Cache-Tags"] = CACHE_TAG
+    
+    # read the smallest sorted list the filters select; the other filters are checked per entry
+    entries = min((BROWSE_INDEX.select(name, value) for name, value in facets.items()), key=len, default=BROWSE_INDEX.select())
     active_sessions = []
-    for s in SESSIONS.values():
-        if s["status"] == "active":
-            session_data = {
-                **s,
-                "availableSlots": s["capacity"] - s["enrolled"],
-            }
-            # Include date from slot if available
-            if s.get("date"):
-                session_data["date"] = s["date"]
-            elif s.get("slots") and s["slots"][0].get("date"):
-                session_data["date"] = s["slots"][0]["date"]
-            
-            active_sessions.append(session_data)
-    
-    # Sort by createdAt descending
-    active_sessions.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
+    next_cursor = None
+    for session_id in BROWSE_INDEX.walk(entries, after, descending=True):
+        s = SESSIONS[session_id]
+        if not matches(s, BROWSE_INDEX.values(session_id)):
+            continue
+        if limit is not None and len(active_sessions) == limit:
+            next_cursor = encode_cursor(BROWSE_INDEX.entry(active_sessions[-1]["id"]))
+            break
+        active_sessions.append(browse_entry(s))
     
     print(f"[sessions] GET /browse - returning {len(active_sessions)} sessions")
     
-    return {"ok": True, "sessions": active_sessions}
+    return {"ok": True, "sessions": active_sessions, "nextCursor": next_cursor, "version": SESSION_CHANGES.version}
 
 
 @app.get("/attended")
@@ -565,6 +846,13 @@ async def get_attended_sessions(request: Request):
 
 # ==================== INTERNAL ENDPOINTS (for Tutors service) ====================
 
+@app.get("/internal/events")
+async def internal_events(request: Request):
+    """Internal: SSE stream of session changes, relayed by the gateway to browsers"""
+    require_service(request)
+    return sse_response(EVENTS, full=True)
+
+
 @app.post("/internal/enroll/{session_id}")
 async def internal_enroll(session_id: str):
     """Internal: Called by Tutors service to increment enrolled count"""
@@ -575,8 +863,9 @@ async def internal_enroll(session_id: str):
     if session["enrolled"] >= session["capacity"]:
         raise HTTPException(status_code=400, detail="session is full")
     
-    session["enrolled"] += 1
+    SESSIONS.modify(session_id, enrolled=session["enrolled"] + 1)
     print(f"[sessions] INTERNAL enroll {session_id} - now {session['enrolled']}/{session['capacity']}")
+    publish_session("session.updated", session)
     
     return {"ok": True, "enrolled": session["enrolled"], "capacity": session["capacity"]}
 
@@ -589,9 +878,10 @@ async def internal_unenroll(session_id: str):
         raise HTTPException(status_code=404, detail="session not found")
     
     if session["enrolled"] > 0:
-        session["enrolled"] -= 1
+        SESSIONS.modify(session_id, enrolled=session["enrolled"] - 1)
     
     print(f"[sessions] INTERNAL unenroll {session_id} - now {session['enrolled']}/{session['capacity']}")
+    publish_session("session.updated", session)
     
     return {"ok": True, "enrolled": session["enrolled"]}
 
@@ -609,26 +899,20 @@ async def internal_get_session(session_id: str):
 @app.put("/internal/slots/{slot_id}/book")
 async def internal_book_slot(slot_id: str, request: Request):
     """Internal: Mark a slot as booked when tutor confirms"""
-    body = await request.json()
-    tutor_id = body.get("tutorId")
+    body = await request.json() if await request.body() else {}
     student_id = body.get("studentId")
     
-    if not tutor_id:
-        raise HTTPException(status_code=400, detail="tutorId required")
-    
-    data = AVAILABILITY.get(tutor_id)
-    if not data:
-        raise HTTPException(status_code=404, detail="tutor availability not found")
-    
-    slot = next((s for s in data["slots"] if s["id"] == slot_id), None)
+    slot = find_slot(slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="slot not found")
+    tutor_id = SLOT_OWNERS[slot_id]
     
     slot["booked"] = True
     slot["bookedBy"] = student_id
     slot["bookedAt"] = datetime.utcnow().isoformat() + "Z"
     
     print(f"[sessions] INTERNAL book slot {slot_id} for student {student_id}")
+    EVENTS.publish("slot.updated", {"slot": slot}, users=[tutor_id])
     
     return {"ok": True, "slot": slot}
 
@@ -636,93 +920,96 @@ async def internal_book_slot(slot_id: str, request: Request):
 @app.put("/internal/slots/{slot_id}/unbook")
 async def internal_unbook_slot(slot_id: str, request: Request):
     """Internal: Unbook a slot when booking is cancelled/rejected"""
-    body = await request.json()
-    tutor_id = body.get("tutorId")
-    
-    if not tutor_id:
-        raise HTTPException(status_code=400, detail="tutorId required")
-    
-    data = AVAILABILITY.get(tutor_id)
-    if not data:
-        raise HTTPException(status_code=404, detail="tutor availability not found")
-    
-    slot = next((s for s in data["slots"] if s["id"] == slot_id), None)
+    slot = find_slot(slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="slot not found")
+    tutor_id = SLOT_OWNERS[slot_id]
     
     slot["booked"] = False
     slot["bookedBy"] = None
     slot["bookedAt"] = None
     
     print(f"[sessions] INTERNAL unbook slot {slot_id}")
+    EVENTS.publish("slot.updated", {"slot": slot}, users=[tutor_id])
     
     return {"ok": True, "slot": slot}
 
 
 # ==================== TUTOR SESSION MANAGEMENT ENDPOINTS ====================
 
+def tutor_session_view(session: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """A session as /tutor/sessions lists it, placed in the current week with a time-based status."""
+    # Determine session status based on time
+    slot = session.get("slots", [{}])[0] if session.get("slots") else {}
+    start_time = slot.get("startTime", "09:00")
+    end_time = slot.get("endTime", "11:00")
+    day = slot.get("day", "Monday")
+    
+    # Create datetime for this week's session
+    days_map = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4, "Saturday": 5, "Sunday": 6}
+    today = now.date()
+    days_ahead = days_map.get(day, 0) - today.weekday()
+    if days_ahead < 0:
+        days_ahead += 7
+    session_date = today + timedelta(days=days_ahead)
+    
+    start_h, start_m = map(int, start_time.split(":"))
+    end_h, end_m = map(int, end_time.split(":"))
+    
+    start_dt = datetime.combine(session_date, datetime.min.time().replace(hour=start_h, minute=start_m))
+    end_dt = datetime.combine(session_date, datetime.min.time().replace(hour=end_h, minute=end_m))
+    
+    # Determine status
+    if now < start_dt:
+        status = "upcoming"
+    elif start_dt <= now <= end_dt:
+        status = "active"
+    else:
+        status = "past"
+    
+    return {
+        "id": session["id"],
+        "tutorId": session.get("tutorId"),
+        "tutorName": session.get("tutorName"),
+        "courseCode": session.get("courseCode"),
+        "courseTitle": session.get("courseTitle"),
+        "capacity": session.get("capacity", 1),
+        "enrolled": session.get("enrolled", 0),
+        "status": status,
+        "mode": slot.get("mode", "online"),
+        "location": slot.get("location") or ("Google Meet" if slot.get("mode") == "online" else "TBD"),
+        "day": day,
+        "startTime": start_dt.isoformat() + "Z",
+        "endTime": end_dt.isoformat() + "Z",
+        "notes": session.get("notes", ""),
+        "createdAt": session.get("createdAt"),
+    }
+
+
 @app.get("/tutor/sessions")
-async def get_tutor_sessions(request: Request):
-    """GET /sessions/tutor/sessions - Get all sessions for the logged-in tutor"""
+async def get_tutor_sessions(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """
+    GET /sessions/tutor/sessions - Get all sessions for the logged-in tutor
+
+    With since (the version of an earlier reply) only the tutor's sessions
+    written after it are returned, plus the ids of deleted ones. Statuses and
+    times of unchanged sessions are not recomputed; clients roll them forward.
+    """
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[sessions] GET /tutor/sessions for tutor_id={tutor_id}")
     
-    tutor_sessions = []
     now = datetime.utcnow()
-    
-    for session_id, session in SESSIONS.items():
-        if session.get("tutorId") == tutor_id:
-            # Determine session status based on time
-            slot = session.get("slots", [{}])[0] if session.get("slots") else {}
-            start_time = slot.get("startTime", "09:00")
-            end_time = slot.get("endTime", "11:00")
-            day = slot.get("day", "Monday")
-            
-            # Create datetime for this week's session
-            days_map = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4, "Saturday": 5, "Sunday": 6}
-            today = now.date()
-            days_ahead = days_map.get(day, 0) - today.weekday()
-            if days_ahead < 0:
-                days_ahead += 7
-            session_date = today + timedelta(days=days_ahead)
-            
-            start_h, start_m = map(int, start_time.split(":"))
-            end_h, end_m = map(int, end_time.split(":"))
-            
-            start_dt = datetime.combine(session_date, datetime.min.time().replace(hour=start_h, minute=start_m))
-            end_dt = datetime.combine(session_date, datetime.min.time().replace(hour=end_h, minute=end_m))
-            
-            # Determine status
-            if now < start_dt:
-                status = "upcoming"
-            elif start_dt <= now <= end_dt:
-                status = "active"
-            else:
-                status = "past"
-            
-            tutor_sessions.append({
-                "id": session_id,
-                "tutorId": session.get("tutorId"),
-                "tutorName": session.get("tutorName"),
-                "courseCode": session.get("courseCode"),
-                "courseTitle": session.get("courseTitle"),
-                "capacity": session.get("capacity", 1),
-                "enrolled": session.get("enrolled", 0),
-                "status": status,
-                "mode": slot.get("mode", "online"),
-                "location": slot.get("location") or ("Google Meet" if slot.get("mode") == "online" else "TBD"),
-                "day": day,
-                "startTime": start_dt.isoformat() + "Z",
-                "endTime": end_dt.isoformat() + "Z",
-                "notes": session.get("notes", ""),
-                "createdAt": session.get("createdAt"),
-            })
+    if since is not None:
+        return SESSION_CHANGES.delta(
+            since, "sessions", lambda s: tutor_session_view(s, now), scope=lambda s: s.get("tutorId") == tutor_id
+        )
+    tutor_sessions = [tutor_session_view(session, now) for session in SESSIONS.where("tutorId", tutor_id)]
     
     # Sort by startTime
     tutor_sessions.sort(key=lambda x: x.get("startTime", ""), reverse=True)
     
-    return {"ok": True, "sessions": tutor_sessions}
+    return {"ok": True, "sessions": tutor_sessions, "version": SESSION_CHANGES.version}
 
 
 @app.get("/tutor/sessions/{session_id}/participants")
@@ -772,7 +1059,7 @@ async def mark_attendance(session_id: str, request: Request):
                 p["status"] = status
                 break
     
-    session["participants"] = participants
+    SESSIONS.modify(session_id, participants=participants)
     
     return {"ok": True, "message": "Attendance saved"}
 
@@ -803,6 +1090,7 @@ async def extend_session(session_id: str, request: Request):
             new_h = total_minutes // 60
             new_m = total_minutes % 60
             slot["endTime"] = f"{new_h:02d}:{new_m:02d}"
+    SESSIONS.modify(session_id)
     
     return {"ok": True, "message": f"Session extended by {minutes} minutes"}
 
@@ -830,6 +1118,8 @@ async def change_session_mode(session_id: str, request: Request):
     for slot in slots:
         slot["mode"] = new_mode
         slot["location"] = new_location if new_mode == "offline" else None
+    # refile under the new mode in the browse index
+    SESSIONS.modify(session_id)
     
     return {"ok": True, "message": f"Session mode changed to {new_mode}"}
 
@@ -851,7 +1141,7 @@ async def save_session_notes(session_id: str, request: Request):
     if session.get("tutorId") != tutor_id:
         raise HTTPException(status_code=403, detail="access denied")
     
-    session["notes"] = notes
+    SESSIONS.modify(session_id, notes=notes)
     
     return {"ok": True, "message": "Notes saved"}
 
@@ -873,9 +1163,11 @@ async def update_session_status(session_id: str, request: Request):
     if session.get("tutorId") != tutor_id:
         raise HTTPException(status_code=403, detail="access denied")
     
-    session["status"] = new_status
+    changes = {"status": new_status}
     if new_status == "past":
-        session["endedAt"] = datetime.utcnow().isoformat() + "Z"
+        changes["endedAt"] = datetime.utcnow().isoformat() + "Z"
+    SESSIONS.modify(session_id, **changes)
+    publish_session("session.updated", session)
     
     return {"ok": True, "message": f"Session status updated to {new_status}"}
 
@@ -883,7 +1175,7 @@ async def update_session_status(session_id: str, request: Request):
 # ==================== SESSION DETAIL (MUST BE LAST) ====================
 
 @app.get("/{session_id}")
-async def get_session_detail(session_id: str, request: Request):
+async def get_session_detail(session_id: str, request: Request, response: Response):
     """GET /sessions/{id} - Get session details"""
     _ = require_auth(request)
     
@@ -891,6 +1183,8 @@ async def get_session_detail(session_id: str, request: Request):
     if not session:
         raise HTTPException(status_code=404, detail="session not found")
     
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["X-Cache-Tags"] = CACHE_TAG
     return {
         "ok": True,
         "session": {**session, "availableSlots": session["capacity"] - session["enrolled"]},
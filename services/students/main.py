@@ -1,17 +1,21 @@
 import base64
 import os
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional
 
-import jwt
 from fastapi import Depends, FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.identity import identity_claims
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-ALGORITHM = "HS256"
-COOKIE_NAME = "access_token"
 
 app = FastAPI(title="Students service", version="1.0.0")
 
@@ -28,6 +32,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "students")
+TRACER = install_tracing(app, "students")
+
 
 class UpdateProfile(BaseModel):
     fullName: Optional[str] = None
@@ -37,13 +44,7 @@ class UpdateProfile(BaseModel):
 
 
 def decode_token(request: Request) -> Dict:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
+    return identity_claims(request)
 
 
 def require_student(request: Request) -> Dict:
@@ -186,6 +187,11 @@ CONVERSATIONS: Dict[str, Dict[str, object]] = {
     },
 }
 
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("students", STUDENTS=STUDENTS)
+# group chats live in the messages snapshot; the sidebar reads the same records
+load_snapshot("messages", CONVERSATIONS=CONVERSATIONS)
+
 
 def ensure_student(student_id: str) -> Dict[str, object]:
     if student_id not in STUDENTS:
@@ -1,17 +1,34 @@
 import os
+import sys
 import base64
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Any
 import httpx
-import jwt
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-ALGORITHM = "HS256"
-COOKIE_NAME = "access_token"
-SESSIONS_UPSTREAM = os.getenv("SESSIONS_UPSTREAM", "http://localhost:4016")
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.changelog import ChangeLog
+from common.events import EventHub, sse_response
+from common.identity import identity_claims
+from common.indexed import IndexedTable
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
+
+# The gateway accepts a comma-separated replica list here; internal calls go to the first one
+SESSIONS_UPSTREAM = os.getenv("SESSIONS_UPSTREAM", "http://localhost:4016").split(",")[0].strip().rstrip("/")
+# Set by the monolith launcher to call the sessions app in-process
+SESSIONS_TRANSPORT: Optional[httpx.AsyncBaseTransport] = None
+# Gateway response cache: profiles are cached per tutor, sessions tag covers enrolled counts
+PROFILE_CACHE_CONTROL = os.getenv("TUTORS_PROFILE_CACHE_CONTROL", "private, s-maxage=60, max-age=0")
+SESSIONS_CACHE_TAG = "sessions"
+# Booking writes kept for ?since= delta polls; a client further behind is told to resync
+CHANGE_LOG_SIZE = int(os.getenv("TUTORS_CHANGE_LOG_SIZE", "10000"))
 
 app = FastAPI(title="Tutors service", version="2.0.0")
 
@@ -28,6 +45,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "tutors")
+TRACER = install_tracing(app, "tutors")
+
+# Booking changes pushed to the gateway, which fans them out to browsers
+EVENTS = EventHub()
+
 
 # ==================== PYDANTIC MODELS ====================
 
@@ -55,13 +78,7 @@ class BookingCancel(BaseModel):
 # ==================== HELPER FUNCTIONS ====================
 
 def decode_token(request: Request) -> Dict:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
+    return identity_claims(request)
 
 
 def require_tutor(request: Request) -> Dict:
@@ -86,6 +103,36 @@ def require_admin(request: Request) -> Dict:
 def require_auth(request: Request) -> Dict:
     return decode_token(request)
 
+def require_service(request: Request) -> Dict:
+    payload = decode_token(request)
+    if payload.get("role") != "SERVICE":
+        raise HTTPException(status_code=403, detail="service access required")
+    return payload
+
+
+@asynccontextmanager
+async def sessions_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Client for calls to the sessions service, timed in /metrics and traced with traceparent."""
+    timing = METRICS.httpx_hooks("sessions")
+    tracing = TRACER.httpx_hooks("sessions")
+    hooks = {event: tracing[event] + timing[event] for event in ("request", "response")}
+    async with httpx.AsyncClient(timeout=10.0, event_hooks=hooks, transport=SESSIONS_TRANSPORT) as client:
+        try:
+            yield client
+        except httpx.RequestError as exc:
+            # failed hops still show up in /traces
+            TRACER.end_failed(exc)
+            raise
+
+
+def publish_booking(booking: Dict[str, Any]) -> None:
+    # tutors currently see every booking (see get_tutor_bookings), so notify all of them
+    EVENTS.publish("booking.updated", {"booking": booking}, users=[booking.get("studentId")], roles=["TUTOR", "ADMIN"])
+
+
+def profile_cache_tag(tutor_id: str) -> str:
+    return f"tutor:{tutor_id}"
+
 
 def format_phone(value: str) -> str:
     digits = "".join(ch for ch in value if ch.isdigit())
@@ -137,7 +184,7 @@ TUTORS: Dict[str, Dict[str, Any]] = {
 }
 
 # Bookings storage
-BOOKINGS: Dict[str, Dict[str, Any]] = {
+BOOKINGS: IndexedTable = IndexedTable(("studentId",), {
     "book-001": {
         "id": "book-001",
         "sessionId": "sess-001",
@@ -173,7 +220,13 @@ BOOKINGS: Dict[str, Dict[str, Any]] = {
         "message": "Want to learn OS concepts.",
         "createdAt": iso(-1, 15),
     },
-}
+})
+
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("tutors", TUTORS=TUTORS, BOOKINGS=BOOKINGS)
+
+# Every BOOKINGS write, for ?since= on /bookings and /tutor/bookings
+BOOKING_CHANGES = ChangeLog(BOOKINGS, CHANGE_LOG_SIZE)
 
 
 def ensure_tutor(tutor_id: str) -> Dict[str, Any]:
@@ -208,20 +261,23 @@ async def health():
 # ==================== PROFILE ENDPOINTS ====================
 
 @app.get("/profile")
-async def get_profile(request: Request):
+async def get_profile(request: Request, response: Response):
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[tutors] GET /profile for tutor_id={tutor_id}")
     data = ensure_tutor(tutor_id)
+    response.headers["Cache-Control"] = PROFILE_CACHE_CONTROL
+    response.headers["X-Cache-Tags"] = profile_cache_tag(tutor_id)
     return {"ok": True, "tutor": data["me"], "stats": data["stats"]}
 
 
 @app.put("/profile")
-async def update_profile(body: UpdateProfile, request: Request):
+async def update_profile(body: UpdateProfile, request: Request, response: Response):
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[tutors] PUT /profile for tutor_id={tutor_id}")
     data = ensure_tutor(tutor_id)
+    response.headers["X-Cache-Purge"] = profile_cache_tag(tutor_id)
     me = data["me"]
 
     if body.fullName is not None:
@@ -245,11 +301,12 @@ async def update_profile(body: UpdateProfile, request: Request):
 
 
 @app.post("/profile/avatar")
-async def update_avatar(request: Request, file: UploadFile = File(None)):
+async def update_avatar(request: Request, response: Response, file: UploadFile = File(None)):
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[tutors] POST /profile/avatar for tutor_id={tutor_id}")
     data = ensure_tutor(tutor_id)
+    response.headers["X-Cache-Purge"] = profile_cache_tag(tutor_id)
 
     if file:
         contents = await file.read()
@@ -261,11 +318,12 @@ async def update_avatar(request: Request, file: UploadFile = File(None)):
 
 
 @app.delete("/profile/avatar")
-async def delete_avatar(request: Request):
+async def delete_avatar(request: Request, response: Response):
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[tutors] DELETE /profile/avatar for tutor_id={tutor_id}")
     data = ensure_tutor(tutor_id)
+    response.headers["X-Cache-Purge"] = profile_cache_tag(tutor_id)
     data["me"]["avatarUrl"] = None
     return {"ok": True}
 
@@ -286,9 +344,8 @@ async def create_booking(body: BookingCreate, request: Request):
     
     # Check if already booked
     existing = next(
-        (b for b in BOOKINGS.values() 
-         if b["studentId"] == student_id 
-         and b["sessionId"] == body.sessionId 
+        (b for b in BOOKINGS.where("studentId", student_id)
+         if b["sessionId"] == body.sessionId 
          and b["status"] not in ["cancelled", "rejected"]),
         None
     )
@@ -297,7 +354,7 @@ async def create_booking(body: BookingCreate, request: Request):
     
     # Call Sessions service to check capacity
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with sessions_client() as client:
             session_resp = await client.get(
                 f"{SESSIONS_UPSTREAM}/internal/{body.sessionId}"
             )
@@ -329,26 +386,30 @@ async def create_booking(body: BookingCreate, request: Request):
     
     BOOKINGS[booking_id] = new_booking
     print(f"[tutors] Created booking {booking_id} with status=pending")
+    publish_booking(new_booking)
     
     return {"ok": True, "booking": new_booking}
 
 
 @app.get("/bookings")
-async def get_student_bookings(request: Request):
-    """GET /tutors/bookings - Student gets their bookings"""
+async def get_student_bookings(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """GET /tutors/bookings - Student gets their bookings
+
+    With since (the version of an earlier reply) only the bookings written
+    after it come back, or resync when BOOKING_CHANGES no longer reaches it.
+    """
     payload = require_student(request)
     student_id = payload.get("sub")
     print(f"[tutors] GET /bookings for student_id={student_id}")
+    if since is not None:
+        return BOOKING_CHANGES.delta(since, "bookings", dict, scope=lambda b: b.get("studentId") == student_id)
     
-    student_bookings = [
-        b for b in BOOKINGS.values() 
-        if b["studentId"] == student_id
-    ]
+    student_bookings = BOOKINGS.where("studentId", student_id)
     
     # Sort by createdAt descending
     student_bookings.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
     
-    return {"ok": True, "bookings": student_bookings}
+    return {"ok": True, "bookings": student_bookings, "version": BOOKING_CHANGES.version}
 
 
 @app.get("/bookings/{booking_id}")
@@ -370,7 +431,7 @@ async def get_booking_detail(booking_id: str, request: Request):
 
 
 @app.post("/bookings/{booking_id}/cancel")
-async def cancel_booking(booking_id: str, body: BookingCancel, request: Request):
+async def cancel_booking(booking_id: str, body: BookingCancel, request: Request, response: Response):
     """POST /tutors/bookings/{id}/cancel - Student cancels booking"""
     payload = require_student(request)
     student_id = payload.get("sub")
@@ -388,39 +449,49 @@ async def cancel_booking(booking_id: str, body: BookingCancel, request: Request)
     
     # Call sessions service to unenroll
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with sessions_client() as client:
             await client.post(
                 f"{SESSIONS_UPSTREAM}/internal/unenroll/{booking['sessionId']}"
             )
     except httpx.RequestError as e:
         print(f"[tutors] Sessions service error: {e}")
     
-    booking["status"] = "cancelled"
-    booking["cancelledAt"] = datetime.utcnow().isoformat() + "Z"
-    booking["cancelReason"] = body.reason or ""
+    booking = BOOKINGS.modify(
+        booking_id,
+        status="cancelled",
+        cancelledAt=datetime.utcnow().isoformat() + "Z",
+        cancelReason=body.reason or "",
+    )
+    response.headers["X-Cache-Purge"] = SESSIONS_CACHE_TAG
     
+    publish_booking(booking)
     return {"ok": True, "booking": booking}
 
 
 # ==================== TUTOR BOOKING MANAGEMENT ====================
 
 @app.get("/tutor/bookings")
-async def get_tutor_bookings(request: Request):
-    """GET /tutors/tutor/bookings - Tutor gets bookings for their sessions"""
+async def get_tutor_bookings(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """GET /tutors/tutor/bookings - Tutor gets bookings for their sessions
+
+    since works as on /bookings.
+    """
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
     print(f"[tutors] GET /tutor/bookings for tutor_id={tutor_id}")
+    if since is not None:
+        return BOOKING_CHANGES.delta(since, "bookings", dict)
     
     # Get tutor's sessions first, then filter bookings
     # For demo, return all bookings (in real app, filter by tutor's sessions)
     all_bookings = list(BOOKINGS.values())
     all_bookings.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
     
-    return {"ok": True, "bookings": all_bookings}
+    return {"ok": True, "bookings": all_bookings, "version": BOOKING_CHANGES.version}
 
 
 @app.post("/tutor/bookings/{booking_id}/confirm")
-async def confirm_booking(booking_id: str, request: Request):
+async def confirm_booking(booking_id: str, request: Request, response: Response):
     """POST /tutors/tutor/bookings/{id}/confirm - Tutor confirms booking
     
     Status flow: pending → confirmed
@@ -438,15 +509,15 @@ async def confirm_booking(booking_id: str, request: Request):
         raise HTTPException(status_code=400, detail=f"booking is {booking['status']}, not pending")
     
     # Update booking status to CONFIRMED
-    booking["status"] = "confirmed"
-    booking["confirmedAt"] = datetime.utcnow().isoformat() + "Z"
-    booking["confirmedBy"] = tutor_id
+    booking = BOOKINGS.modify(
+        booking_id, status="confirmed", confirmedAt=datetime.utcnow().isoformat() + "Z", confirmedBy=tutor_id
+    )
     
     # Call Sessions service to:
     # 1. Increment enrolled count
     # 2. Mark slot as booked (if applicable)
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with sessions_client() as client:
             # Enroll student in session
             enroll_resp = await client.post(
                 f"{SESSIONS_UPSTREAM}/internal/enroll/{booking['sessionId']}"
@@ -459,16 +530,15 @@ async def confirm_booking(booking_id: str, request: Request):
             if slot_id:
                 await client.put(
                     f"{SESSIONS_UPSTREAM}/internal/slots/{slot_id}/book",
-                    json={
-                        "tutorId": tutor_id,
-                        "studentId": booking["studentId"],
-                    }
+                    json={"studentId": booking["studentId"]},
                 )
     except httpx.RequestError as e:
         print(f"[tutors] Sessions service error: {e}")
     
     print(f"[tutors] Booking {booking_id} confirmed - student can now see it in Course Registration")
+    response.headers["X-Cache-Purge"] = SESSIONS_CACHE_TAG
     
+    publish_booking(booking)
     return {"ok": True, "booking": booking}
 
 
@@ -490,17 +560,18 @@ async def reject_booking(booking_id: str, request: Request):
         raise HTTPException(status_code=400, detail=f"booking is {booking['status']}, not pending")
     
     # Update status to REJECTED (not cancelled - that's for student cancellation)
-    booking["status"] = "rejected"
-    booking["rejectedAt"] = datetime.utcnow().isoformat() + "Z"
-    booking["rejectedBy"] = tutor_id
+    booking = BOOKINGS.modify(
+        booking_id, status="rejected", rejectedAt=datetime.utcnow().isoformat() + "Z", rejectedBy=tutor_id
+    )
     
     print(f"[tutors] Booking {booking_id} rejected")
     
+    publish_booking(booking)
     return {"ok": True, "booking": booking}
 
 
 @app.post("/tutor/bookings/{booking_id}/complete")
-async def complete_booking(booking_id: str, request: Request):
+async def complete_booking(booking_id: str, request: Request, response: Response):
     """POST /tutors/tutor/bookings/{id}/complete - Tutor marks booking complete"""
     payload = require_tutor(request)
     tutor_id = payload.get("sub")
@@ -513,13 +584,14 @@ async def complete_booking(booking_id: str, request: Request):
     if booking["status"] != "confirmed":
         raise HTTPException(status_code=400, detail="booking must be confirmed first")
     
-    booking["status"] = "completed"
-    booking["completedAt"] = datetime.utcnow().isoformat() + "Z"
+    booking = BOOKINGS.modify(booking_id, status="completed", completedAt=datetime.utcnow().isoformat() + "Z")
     
     # Update tutor stats
     data = ensure_tutor(tutor_id)
     data["stats"]["totalSessions"] = data["stats"].get("totalSessions", 0) + 1
+    response.headers["X-Cache-Purge"] = profile_cache_tag(tutor_id)
     
+    publish_booking(booking)
     return {"ok": True, "booking": booking}
 
 # ==================== ADMIN BOOKING ENDPOINTS ====================
@@ -563,6 +635,15 @@ async def get_booking_detail_admin(booking_id: str, request: Request):
     
     return {"ok": True, "booking": booking}
 
+
+# ==================== INTERNAL ENDPOINTS (for API Gateway) ====================
+
+@app.get("/internal/events")
+async def internal_events(request: Request):
+    """Internal: SSE stream of booking changes, relayed by the gateway to browsers"""
+    require_service(request)
+    return sse_response(EVENTS, full=True)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,14 +1,19 @@
 import os
+import sys
+from pathlib import Path
 from typing import Dict
 
-import jwt
 from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
-ALGORITHM = "HS256"
-COOKIE_NAME = "access_token"
+# services/ holds the shared helpers package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.identity import identity_claims
+from common.metrics import install_metrics
+from common.snapshot import load_snapshot
+from common.tracing import install_tracing
+
 
 app = FastAPI(title="Users service", version="1.0.0")
 
@@ -25,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+METRICS = install_metrics(app, "users")
+TRACER = install_tracing(app, "users")
+
 
 class UpdateProfile(BaseModel):
     fullName: str
@@ -45,15 +53,12 @@ USERS: Dict[str, Dict[str, str]] = {
     }
 }
 
+# Generated dataset (services/datagen.py), merged in when SNAPSHOT_DIR is set
+load_snapshot("users", USERS=USERS)
+
 
 def require_user(request: Request) -> Dict[str, str]:
-    token = request.cookies.get(COOKIE_NAME)
-    if not token:
-        raise HTTPException(status_code=401, detail="unauthorized")
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-    except jwt.InvalidTokenError as exc:
-        raise HTTPException(status_code=401, detail="unauthorized") from exc
+    payload = identity_claims(request)
     user_id = payload.get("sub")
     if not user_id or user_id not in USERS:
         raise HTTPException(status_code=401, detail="unauthorized")